@@ -0,0 +1,322 @@
+"""Pac-Man autopilot: iterative-deepening expectimax (or minimax) over the ghosts' moves.
+
+The model follows the game's schedule: Pac-Man moves every pacman_speed ticks,
+the ghosts every ghost_speed ticks, and within one tick Pac-Man moves first.
+The max_ghosts ghosts closest to Pac-Man are searched: as chance nodes that
+mostly step toward him (expectimax) or as adversaries (minimax, with
+alpha-beta). Other chasing ghosts in range just step toward him, and ghosts
+that do not chase on the level are walls that catch.
+
+Each choose() deepens one Pac-Man move at a time until budget seconds pass and
+answers with the best move of the deepest finished iteration. With no time
+budget, max_nodes bounds it instead, so the same position always gets the same
+answer. Positions are
+Zobrist-hashed into a transposition table, so the many move orders that reach
+the same position are searched once.
+"""
+import random
+from collections import deque
+from time import perf_counter
+
+PACMAN, GHOSTS = 0, 1  # schedule events
+CAUGHT = -1_000_000  # plus the event index, so a later capture scores higher
+EXACT, LOWER, UPPER = 0, 1, 2  # transposition table bounds
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Autopilot:
+    def __init__(self, maze, budget=0.01, max_depth=10, model="expectimax", chase=0.8, max_ghosts=2, reach=6,
+                 tt_size=1 << 18, seed=0, max_nodes=10000):
+        if model not in ("expectimax", "minimax"):
+            raise ValueError(f"Unknown autopilot model {model!r}, expected 'expectimax' or 'minimax'")
+        self.maze = maze
+        self.budget = budget  # seconds per choose(); None stops at max_nodes instead (deterministic)
+        self.max_depth = max_depth  # Pac-Man moves
+        self.max_nodes = max_nodes  # nodes per choose() when there is no budget; about 10-20 ms at 10000
+        self.model = model
+        self.chase = chase  # chance a searched ghost steps toward Pac-Man in the expectimax model
+        self.max_ghosts = max_ghosts
+        self.reach = reach  # moves around Pac-Man the evaluation counts safe cells in
+        self.tt_size = tt_size
+        self.radius = 2 * max_depth + 4  # distance fields stop here; farther ghosts cannot matter in time
+        self.rng = random.Random(seed)
+        self.zobrist = {}  # (piece, cell) -> random 64-bit key, drawn on first use
+        self.fields = {}  # Pac-Man cell -> {cell: distance} within radius
+        self.open_areas = {}  # Pac-Man cell -> territory() with no ghost in range, for the current walls
+        self.walls = set()  # cells of the ghosts that do not chase on the level
+        self.table = {}
+        self.evaluations = {}  # position key -> evaluate()
+        self.metrics = {
+            "search_time": 0,
+            "depth": 0,
+            "nodes": 0,
+            "tt_hits": 0,
+            "tt_probes": 0
+        }
+
+    def key(self, piece, cell):
+        zobrist = self.zobrist
+        value = zobrist.get((piece, cell))
+        if value is None:
+            value = zobrist[(piece, cell)] = self.rng.getrandbits(64)
+        return value
+
+    def neighbors(self, cell):
+        offsets = self.maze.neighbor_offsets
+        return self.maze.neighbor_ids[offsets[cell]:offsets[cell + 1]]
+
+    def field(self, cell):
+        """BFS distances out of cell, up to radius"""
+        field = self.fields.get(cell)
+        if field is None:
+            if len(self.fields) > 4096:
+                self.fields.clear()
+            field = self.fields[cell] = {cell: 0}
+            queue = deque([cell])
+            while queue:
+                current = queue.popleft()
+                distance = field[current] + 1
+                if distance > self.radius:
+                    break
+                for neighbor in self.neighbors(current):
+                    if neighbor not in field:
+                        field[neighbor] = distance
+                        queue.append(neighbor)
+        return field
+
+    def schedule(self, simulation):
+        """Events from now until max_depth more Pac-Man moves (counters as update() sees them)"""
+        events = []
+        ghost_wait = max(0, simulation.ghost_speed - simulation.ghost_move_counter)
+        for ply in range(self.max_depth + 1):
+            events.append(PACMAN)
+            tick = ply * simulation.pacman_speed
+            while simulation.ghost_move and ghost_wait < tick + simulation.pacman_speed:
+                events.append(GHOSTS)
+                ghost_wait += simulation.ghost_speed
+        return events
+
+    def choose(self, simulation):
+        """Pac-Man's move for this tick as a (dx, dy) direction, or None to stay"""
+        started = perf_counter()
+        maze = self.maze
+        root = self.pacman = maze.cell_id(simulation.pacman.position)
+        field = self.field(root)
+        chasers = sorted((field.get(cell, self.radius + 1), cell)
+                         for cell in map(maze.cell_id, (ghost.position for ghost in simulation.active_ghosts())))
+        chasers = [cell for distance, cell in chasers if distance <= self.radius]
+        self.searched = chasers[:self.max_ghosts]
+        self.greedy = chasers[self.max_ghosts:]
+        chasing = set(map(id, simulation.active_ghosts()))
+        walls = {maze.cell_id(ghost.position) for ghost in simulation.ghosts if id(ghost) not in chasing}
+        if walls != self.walls:
+            self.walls = walls
+            self.open_areas = {}
+        self.events = self.schedule(simulation)
+        self.speeds = simulation.pacman_speed, simulation.ghost_speed
+
+        self.table = {}
+        self.evaluations = {}
+        self.nodes = self.tt_hits = self.tt_probes = 0
+        self.deadline = None
+        self.node_limit = None
+        best, depth = None, 0
+        for iteration in range(1, self.max_depth + 1):
+            if iteration == 2:  # depth 1 always finishes
+                if self.budget is not None:
+                    self.deadline = started + self.budget
+                else:
+                    self.node_limit = self.max_nodes
+            try:
+                _, move = self.pacman_node(0, iteration, self.position_key(), CAUGHT * 2, -CAUGHT * 2)
+            except SearchTimeout:  # abandons the iteration midway, with the pieces wherever it left them
+                break
+            best, depth = move, iteration
+            if not self.searched and not self.greedy and not self.walls:
+                break  # nothing to evade, deeper searches would agree
+
+        self.metrics = {
+            "search_time": perf_counter() - started,
+            "depth": depth,
+            "nodes": self.nodes,
+            "tt_hits": self.tt_hits,
+            "tt_probes": self.tt_probes
+        }
+        if best is None or best == root:
+            return None
+        y, x = divmod(best, maze.width)
+        pacman_y, pacman_x = divmod(root, maze.width)
+        return (x - pacman_x, y - pacman_y)
+
+    def position_key(self):
+        key = self.key("pacman", self.pacman)
+        for i, cell in enumerate(self.searched + self.greedy):
+            key ^= self.key(i, cell)
+        return key
+
+    def tick(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout
+        if self.deadline is not None and not self.nodes & 63 and perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def caught(self):
+        pacman = self.pacman
+        return pacman in self.walls or pacman in self.searched or pacman in self.greedy
+
+    def territory(self):
+        """Cells within reach that Pac-Man gets to before every chasing ghost; small in a dead end"""
+        far = self.radius + 1
+        pacman_speed, ghost_speed = self.speeds
+        # A ghost farther than this cannot claim any cell within reach first
+        horizon = self.reach + self.reach * pacman_speed // ghost_speed
+        field = self.field(self.pacman)
+        ghost_fields = [self.field(cell) for cell in self.searched + self.greedy if field.get(cell, far) <= horizon]
+        if not ghost_fields and self.pacman in self.open_areas:
+            return self.open_areas[self.pacman]
+        walls = self.walls
+        seen = {self.pacman: 0}
+        queue = deque([self.pacman])
+        count = 0
+        while queue:
+            cell = queue.popleft()
+            distance = seen[cell]
+            arrival = distance * pacman_speed
+            for ghost_field in ghost_fields:
+                if ghost_field.get(cell, far) * ghost_speed <= arrival:
+                    break  # a ghost is there first, and so closer to everything behind it
+            else:
+                count += 1
+                if distance < self.reach:
+                    for neighbor in self.neighbors(cell):
+                        if neighbor not in seen and neighbor not in walls:
+                            seen[neighbor] = distance + 1
+                            queue.append(neighbor)
+        if not ghost_fields:
+            self.open_areas[self.pacman] = count
+        return count
+
+    def evaluate(self):
+        field = self.field(self.pacman)
+        far = self.radius + 1
+        distances = [field.get(cell, far) for cell in self.searched + self.greedy]
+        closest = min(distances, default=far)
+        # Keep the closest ghost a few moves away, then keep room to run, then distance from the rest
+        return 1000 * min(closest, 6) + 10 * self.territory() + sum(distances)
+
+    def pacman_node(self, index, depth, key, alpha, beta):
+        """Best (value, move) with depth Pac-Man moves left, events[index] being his move"""
+        self.tick()
+        if depth == 0:
+            value = self.evaluations.get(key)
+            if value is None:
+                value = self.evaluations[key] = self.evaluate()
+            return value, None
+        table_key = key ^ self.key("event", index)
+        self.tt_probes += 1
+        entry = self.table.get(table_key)
+        best_move = None
+        if entry is not None:
+            entry_depth, value, bound, best_move = entry
+            if entry_depth >= depth and (bound == EXACT or (bound == LOWER and value >= beta) or
+                                         (bound == UPPER and value <= alpha)):
+                self.tt_hits += 1
+                return value, best_move
+
+        start = self.pacman
+        moves = [start] + list(self.neighbors(start))
+        if best_move in moves:  # the previous iteration's best move first
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+        original_alpha = alpha
+        best_value = None
+        for move in moves:
+            self.pacman = move
+            move_key = key ^ self.key("pacman", start) ^ self.key("pacman", move)
+            if self.caught():
+                value = CAUGHT + index
+            else:
+                value = self.next_node(index + 1, depth - 1, move_key, alpha, beta)
+            self.pacman = start
+            if best_value is None or value > best_value:
+                best_value, best_move = value, move
+            if self.model == "minimax":
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+
+        bound = EXACT
+        if self.model == "minimax":
+            bound = LOWER if best_value >= beta else UPPER if best_value <= original_alpha else EXACT
+        if len(self.table) >= self.tt_size:
+            self.table.clear()
+        self.table[table_key] = (depth, best_value, bound, best_move)
+        return best_value, best_move
+
+    def next_node(self, index, depth, key, alpha, beta):
+        if self.events[index] == PACMAN:
+            return self.pacman_node(index, depth, key, alpha, beta)[0]
+        return self.ghost_node(index, depth, key, 0, alpha, beta)
+
+    def ghost_node(self, index, depth, key, slot, alpha, beta):
+        """Value after searched ghost slot and the ones after it move, then the greedy ones"""
+        self.tick()
+        searched = self.searched
+        if slot == len(searched):
+            return self.greedy_step(index, depth, key, alpha, beta)
+
+        cell = searched[slot]
+        moves = list(self.neighbors(cell)) or [cell]
+        field = self.field(self.pacman)
+        far = self.radius + 1
+        if self.model == "minimax":
+            value = -CAUGHT * 2
+            for move in moves:
+                searched[slot] = move
+                value = min(value, self.ghost_node(index, depth, key ^ self.key(slot, cell) ^ self.key(slot, move),
+                                                   slot + 1, alpha, beta))
+                searched[slot] = cell
+                beta = min(beta, value)
+                if alpha >= beta:
+                    break
+            return value
+
+        distance = field.get(cell, far)
+        closer = [move for move in moves if field.get(move, far) < distance]
+        value = 0
+        for move in moves:
+            probability = (1 - self.chase) / len(moves)
+            if move in closer:
+                probability += self.chase / len(closer)
+            elif not closer:
+                probability += self.chase / len(moves)
+            searched[slot] = move
+            value += probability * self.ghost_node(index, depth, key ^ self.key(slot, cell) ^ self.key(slot, move),
+                                                   slot + 1, alpha, beta)
+            searched[slot] = cell
+        return value
+
+    def greedy_step(self, index, depth, key, alpha, beta):
+        greedy = self.greedy
+        previous = list(greedy)
+        if greedy:
+            field = self.field(self.pacman)
+            far = self.radius + 1
+            offset = len(self.searched)
+            for i, cell in enumerate(previous):
+                distance = field.get(cell, far)
+                for move in self.neighbors(cell):
+                    if field.get(move, far) < distance:
+                        greedy[i] = move
+                        key ^= self.key(offset + i, cell) ^ self.key(offset + i, move)
+                        break
+        if self.caught():
+            value = CAUGHT + index
+        else:
+            value = self.next_node(index + 1, depth, key, alpha, beta)
+        greedy[:] = previous
+        return value
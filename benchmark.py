@@ -0,0 +1,187 @@
+"""Batch benchmark of the ghost search algorithms.
+
+Runs every algorithm on many start/target pairs of many maps, spread over a
+process pool, and writes p50/p95/p99 search time, peak memory and nodes
+expanded per map and algorithm as CSV or JSON.
+
+    python benchmark.py pacman_map.csv pacman_map1.csv --pairs 2000 --output results.csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from constants import PATH
+from maze import Maze, load_maze_layout
+from instrumentation import Instrumentation, MODES, FULL
+from ghosts import (Ghost, BlueGhost, PinkGhost, OrangeGhost, RedGhost, PurpleGhost, CyanGhost, GreenGhost, MagentaGhost,
+                    BidirectionalBlueGhost, BidirectionalRedGhost, CorridorGhost)
+from distance_field import DistanceFieldCache
+from hierarchy import ClusterGraph
+from jump_points import JumpTable
+from corridors import CorridorGraph
+
+ALGORITHMS = {
+    "bfs": BlueGhost,
+    "dfs": PinkGhost,
+    "ucs": OrangeGhost,
+    "astar": RedGhost,
+    "ucs_bucket": partial(OrangeGhost, queue="bucket"),
+    "ucs_radix": partial(OrangeGhost, queue="radix"),
+    "astar_bucket": partial(RedGhost, queue="bucket"),
+    "astar_radix": partial(RedGhost, queue="radix"),
+    "bidirectional_bfs": BidirectionalBlueGhost,
+    "bidirectional_astar": BidirectionalRedGhost,
+    "incremental_astar": PurpleGhost,
+    "distance_field": CyanGhost,
+    "hpa": GreenGhost,
+    "jps": MagentaGhost,
+    "jps_plus": MagentaGhost,
+    "corridor_bfs": CorridorGhost,
+    "corridor_dfs": CorridorGhost,
+    "corridor_ucs": CorridorGhost,
+    "corridor_astar": CorridorGhost,
+}
+
+worker_mazes = {}  # map path -> Maze, loaded once per worker process
+worker_hierarchies = {}  # map path -> ClusterGraph, built on first use in each worker
+worker_jump_tables = {}  # map path -> JumpTable, built on first use in each worker
+worker_corridors = {}  # map path -> CorridorGraph, built on first use in each worker
+
+
+def init_worker(map_paths, instrumentation_mode):
+    Ghost.instrumentation = Instrumentation(instrumentation_mode)
+    for path in map_paths:
+        worker_mazes[path] = Maze(load_maze_layout(path))
+
+
+def make_ghost(algorithm, map_path, position):
+    if algorithm == "distance_field":
+        # Fresh cache per run so the measured search is the BFS, not a cache hit
+        return CyanGhost(position, DistanceFieldCache(worker_mazes[map_path]))
+    if algorithm == "hpa":
+        # The cluster graph is built once per map and is not part of the measured search
+        if map_path not in worker_hierarchies:
+            worker_hierarchies[map_path] = ClusterGraph(worker_mazes[map_path])
+        return GreenGhost(position, worker_hierarchies[map_path])
+    if algorithm == "jps_plus":
+        if map_path not in worker_jump_tables:
+            worker_jump_tables[map_path] = JumpTable(worker_mazes[map_path])
+        return MagentaGhost(position, worker_jump_tables[map_path])
+    if algorithm.startswith("corridor_"):
+        if map_path not in worker_corridors:
+            worker_corridors[map_path] = CorridorGraph(worker_mazes[map_path])
+        return CorridorGhost(position, worker_corridors[map_path], algorithm[len("corridor_"):])
+    return ALGORITHMS[algorithm](position)
+
+
+def run_chunk(map_path, algorithm, pairs):
+    """Run one algorithm over a chunk of pairs; returns (search_time, memory_usage, nodes, found, cells) rows"""
+    maze = worker_mazes[map_path]
+    rows = []
+    for start, target in pairs:
+        ghost = make_ghost(algorithm, map_path, start)
+        ghost.find_path(maze, target)
+        metrics = ghost.finish_path(maze)  # hpa refines its path as it walks; time all of it
+        found = start == target or ghost.path_end() == target
+        # cells: per-cell work behind the nodes, which only differs for contracted graphs
+        rows.append((metrics["search_time"], metrics["memory_usage"], metrics["nodes_expanded"], found,
+                     metrics.get("cells_covered", metrics["nodes_expanded"])))
+    return map_path, algorithm, rows
+
+
+def random_pairs(maze, count, rng):
+    # Cell ids rather than positions keep this list small on 4096x4096 maps
+    cells = [cell for cell, value in enumerate(maze.cells) if value == PATH]
+    return [(maze.cell_position(rng.choice(cells)), maze.cell_position(rng.choice(cells))) for _ in range(count)]
+
+
+def percentile(sorted_values, p):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    k = (len(sorted_values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def summarize(map_path, algorithm, rows):
+    times = sorted(row[0] * 1000 for row in rows)  # ms
+    memory = sorted(row[1] for row in rows if row[1] is not None)  # KB, absent unless traced
+    nodes = sorted(row[2] for row in rows)
+    summary = {"map": map_path, "algorithm": algorithm, "runs": len(rows),
+               "found": sum(1 for row in rows if row[3])}
+    for name, values in (("time_ms", times), ("memory_kb", memory), ("nodes", nodes)):
+        for p in (50, 95, 99):
+            summary[f"{name}_p{p}"] = round(percentile(values, p), 6)
+    summary["memory_kb_peak"] = round(memory[-1], 6) if memory else 0
+    summary["nodes_mean"] = round(sum(nodes) / len(nodes), 3) if nodes else 0
+    summary["cells_covered_mean"] = round(sum(row[4] for row in rows) / len(rows), 3) if rows else 0
+    return summary
+
+
+def run_benchmark(map_paths, algorithms, pairs_per_map, seed=0, workers=None, chunk_size=50,
+                  instrumentation_mode=FULL):
+    rng = random.Random(seed)
+    tasks = []
+    for path in map_paths:
+        pairs = random_pairs(Maze(load_maze_layout(path)), pairs_per_map, rng)
+        for algorithm in algorithms:
+            for i in range(0, len(pairs), chunk_size):
+                tasks.append((path, algorithm, pairs[i:i + chunk_size]))
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(map_paths, instrumentation_mode)) as pool:
+        futures = [pool.submit(run_chunk, *task) for task in tasks]
+        for future in futures:
+            map_path, algorithm, rows = future.result()
+            results.setdefault((map_path, algorithm), []).extend(rows)
+
+    return [summarize(path, algorithm, results.get((path, algorithm), []))
+            for path in map_paths for algorithm in algorithms]
+
+
+def write_results(summaries, output):
+    if output.endswith(".json"):
+        with open(output, "w") as file:
+            json.dump(summaries, file, indent=2)
+    else:
+        with open(output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(summaries[0]))
+            writer.writeheader()
+            writer.writerows(summaries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ghost search algorithms")
+    parser.add_argument("maps", nargs="+", help="map CSV files")
+    parser.add_argument("--algorithms", nargs="+", default=["bfs", "dfs", "ucs", "astar"],
+                        choices=list(ALGORITHMS))
+    parser.add_argument("--pairs", type=int, default=1000, help="random start/target pairs per map")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=50, help="pairs per task sent to a worker")
+    parser.add_argument("--instrumentation", default=FULL, choices=MODES,
+                        help="timing only is much cheaper; full also traces memory")
+    parser.add_argument("--output", help="write results to a .csv or .json file")
+    args = parser.parse_args(argv)
+
+    summaries = run_benchmark(args.maps, args.algorithms, args.pairs, args.seed, args.workers, args.chunk_size,
+                              args.instrumentation)
+    for s in summaries:
+        print(f"{s['map']:<20} {s['algorithm']:<18} runs={s['runs']:<6} "
+              f"time p50/p95/p99={s['time_ms_p50']:.3f}/{s['time_ms_p95']:.3f}/{s['time_ms_p99']:.3f} ms  "
+              f"mem p99={s['memory_kb_p99']:.1f} KB  nodes p50={s['nodes_p50']:.0f}")
+    if args.output:
+        write_results(summaries, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+BLUE = (0, 0, 255)
+PINK = (255, 192, 203)
+ORANGE = (255, 165, 0)
+RED = (255, 0, 0)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+GRAY = (128, 128, 128)
+CYAN = (0, 255, 255)
+PURPLE = (160, 32, 240)
+MAGENTA = (255, 0, 255)
+
+# Constants
+CELL_SIZE = 30
+WALL = 1
+PATH = 0
+NEIGHBOR_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
@@ -0,0 +1,223 @@
+from array import array
+from itertools import chain
+
+from constants import PATH
+from priority_queues import QUEUES
+
+
+class CorridorGraph:
+    """Maze with every corridor contracted into one weighted edge.
+
+    Nodes are the open cells whose degree is not 2 (junctions and dead ends).
+    Each run of degree-2 cells between two nodes becomes an edge weighted by
+    its number of moves, with its cells kept CSR-style in run order so a path
+    can be expanded back without searching. search() attaches a start or goal
+    lying inside a corridor to the two ends of that corridor on the fly.
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        cells = maze.cells
+        offsets = maze.neighbor_offsets
+        self.is_node = bytearray(1 if value == PATH and offsets[cell + 1] - offsets[cell] != 2 else 0
+                                 for cell, value in enumerate(cells))
+        self.open_cells = sum(1 for value in cells if value == PATH)
+        # Edge e runs from edge_ends[2e] to edge_ends[2e + 1] through
+        # corridor_cells[corridor_offsets[e]:corridor_offsets[e + 1]]
+        self.edge_ends = array('i')
+        self.corridor_offsets = array('i', [0])
+        self.corridor_cells = array('i')
+        self.edge_of = array('i', [-1]) * len(cells)  # corridor cell -> its edge
+        self.index_in_edge = array('i', [0]) * len(cells)  # corridor cell -> position in its run
+        self.links = {}  # node -> [(neighbor node, cost, edge, forward)]
+        self.build()
+
+    def __getstate__(self):
+        # The maze holds memoryviews, which do not pickle; an unpickled graph
+        # gets the maze of the process it lands in through set_maze()
+        state = self.__dict__.copy()
+        state["maze"] = None
+        return state
+
+    def set_maze(self, maze):
+        if self.maze is None:
+            self.maze = maze
+
+    @property
+    def node_count(self):
+        return len(self.links)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_ends) // 2
+
+    def build(self):
+        maze, is_node = self.maze, self.is_node
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        self.links = {cell: [] for cell in range(len(is_node)) if is_node[cell]}
+        for cell in list(self.links):
+            for neighbor in neighbor_ids[offsets[cell]:offsets[cell + 1]]:
+                if is_node[neighbor] and neighbor > cell:
+                    self.add_edge(cell, neighbor, [])  # two adjacent nodes, nothing to contract
+                elif not is_node[neighbor] and self.edge_of[neighbor] < 0:
+                    run, end = self.walk(cell, neighbor)
+                    self.add_edge(cell, end, run)
+
+        # Rings of degree-2 cells have no node to start from; make one cell of each a node
+        for cell in range(len(is_node)):
+            if maze.cells[cell] == PATH and not is_node[cell] and self.edge_of[cell] < 0:
+                is_node[cell] = 1
+                self.links[cell] = []
+                first = neighbor_ids[offsets[cell]]
+                run, end = self.walk(cell, first)
+                self.add_edge(cell, end, run)
+
+    def walk(self, node, first):
+        """Follow the corridor entered from node through first; returns (its cells, the node at its end)"""
+        offsets, neighbor_ids, is_node = self.maze.neighbor_offsets, self.maze.neighbor_ids, self.is_node
+        run = []
+        previous, current = node, first
+        while not is_node[current]:
+            run.append(current)
+            a, b = neighbor_ids[offsets[current]:offsets[current + 1]]
+            previous, current = current, (b if a == previous else a)
+        return run, current
+
+    def add_edge(self, a, b, run):
+        edge = len(self.edge_ends) // 2
+        self.edge_ends.extend((a, b))
+        for i, cell in enumerate(run):
+            self.edge_of[cell] = edge
+            self.index_in_edge[cell] = i
+        self.corridor_cells.extend(run)
+        self.corridor_offsets.append(len(self.corridor_cells))
+        if a != b:  # a loop back to the same node never shortens a path
+            cost = len(run) + 1
+            self.links[a].append((b, cost, edge, True))
+            self.links[b].append((a, cost, edge, False))
+
+    def attach(self, cell, extra, goal=False):
+        """Temporary links between a corridor cell and the two ends of its corridor"""
+        edge = self.edge_of[cell]
+        a, b = self.edge_ends[2 * edge], self.edge_ends[2 * edge + 1]
+        i = self.index_in_edge[cell]
+        length = self.corridor_offsets[edge + 1] - self.corridor_offsets[edge]
+        if goal:
+            extra.setdefault(a, []).append((cell, i + 1, edge, True))
+            extra.setdefault(b, []).append((cell, length - i, edge, False))
+        else:
+            extra.setdefault(cell, []).extend([(a, i + 1, edge, False), (b, length - i, edge, True)])
+
+    def hop_cells(self, source, target, edge, forward):
+        """Cells (source excluded) walked from source to target along one edge"""
+        start, end = self.corridor_offsets[edge], self.corridor_offsets[edge + 1]
+        # Positions along the run: -1 is the edge's first node, end - start its last one
+        source_index = self.index_in_edge[source] if self.edge_of[source] == edge else (-1 if forward else end - start)
+        interior_target = self.edge_of[target] == edge
+        if forward:
+            last = start + self.index_in_edge[target] + 1 if interior_target else end
+            cells = list(self.corridor_cells[start + source_index + 1:last])
+        else:
+            first = start + self.index_in_edge[target] if interior_target else start
+            cells = list(self.corridor_cells[first:start + source_index])
+            cells.reverse()
+        if self.is_node[target]:
+            cells.append(target)
+        return cells
+
+    def expand(self, came_from, goal):
+        """Per-cell path (start excluded) from the search's parent map"""
+        hops = []
+        node = goal
+        while came_from[node] is not None:
+            parent, edge, forward = came_from[node]
+            hops.append((parent, node, edge, forward))
+            node = parent
+        cells = []
+        for parent, node, edge, forward in reversed(hops):
+            cells.extend(self.hop_cells(parent, node, edge, forward))
+        return cells
+
+    def covered(self, nodes, edges):
+        """Distinct cells under some nodes and the corridors of some edges: what a per-cell search would touch"""
+        offsets = self.corridor_offsets
+        return len(nodes) + sum(offsets[edge + 1] - offsets[edge] for edge in edges)
+
+    def endpoints(self, start, goal):
+        """Temporary links for a start and goal inside corridors"""
+        extra = {}
+        if not self.is_node[start]:
+            self.attach(start, extra)
+        if not self.is_node[goal]:
+            self.attach(goal, extra, goal=True)
+        edge = self.edge_of[start]
+        if edge >= 0 and edge == self.edge_of[goal]:  # same corridor, straight along it
+            i, j = self.index_in_edge[start], self.index_in_edge[goal]
+            extra[start].append((goal, abs(i - j), edge, j > i))
+        return extra
+
+    def search(self, start, goal, queue="heap", heuristic=False):
+        """Best-first search between two cell ids on the contracted graph.
+
+        With queue "heap" this is Dijkstra; "bucket" gives Dial's algorithm,
+        the weighted counterpart of BFS; heuristic adds the Manhattan distance
+        (A*). Returns (cells after start, [] if unreachable, nodes expanded,
+        cells covered).
+        """
+        if start == goal:
+            return [], 0, 0
+        width = self.maze.width
+        goal_y, goal_x = divmod(goal, width)
+        extra = self.endpoints(start, goal)
+        links = self.links
+        new_queue, push, pop = QUEUES[queue]
+        frontier = new_queue()
+        y, x = divmod(start, width)
+        push(frontier, ((abs(x - goal_x) + abs(y - goal_y)) if heuristic else 0, start))
+        came_from = {start: None}
+        g_score = {start: 0}
+        closed = set()
+        relaxed = set()
+        nodes_expanded = 0
+        while frontier:
+            _, current = pop(frontier)
+            nodes_expanded += 1
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == goal:
+                return self.expand(came_from, goal), nodes_expanded, self.covered(closed, relaxed)
+            for neighbor, cost, edge, forward in chain(links.get(current, ()), extra.get(current, ())):
+                relaxed.add(edge)
+                tentative_g_score = g_score[current] + cost
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = (current, edge, forward)
+                    g_score[neighbor] = tentative_g_score
+                    priority = tentative_g_score
+                    if heuristic:
+                        y, x = divmod(neighbor, width)
+                        priority += abs(x - goal_x) + abs(y - goal_y)
+                    push(frontier, (priority, neighbor))
+        return [], nodes_expanded, self.covered(closed, relaxed)
+
+    def depth_first(self, start, goal):
+        """DFS on the contracted graph; same return value as search(), the path is not the shortest"""
+        if start == goal:
+            return [], 0, 0
+        extra = self.endpoints(start, goal)
+        links = self.links
+        stack = [start]
+        came_from = {start: None}
+        relaxed = set()
+        nodes_expanded = 0
+        while stack:
+            current = stack.pop()
+            nodes_expanded += 1
+            if current == goal:
+                return self.expand(came_from, goal), nodes_expanded, self.covered(came_from, relaxed)
+            for neighbor, cost, edge, forward in reversed(list(chain(links.get(current, ()), extra.get(current, ())))):
+                if neighbor not in came_from:
+                    relaxed.add(edge)
+                    came_from[neighbor] = (current, edge, forward)
+                    stack.append(neighbor)
+        return [], nodes_expanded, self.covered(came_from, relaxed)
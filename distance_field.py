@@ -0,0 +1,113 @@
+from collections import deque, OrderedDict
+from array import array
+
+
+def bfs_distance_field(maze, target):
+    """Distances (in moves) from every cell to the target cell id, -1 where unreachable.
+
+    Moves are symmetric, so one BFS out of the target labels every cell at once.
+    Returns the field and the number of cells expanded.
+    """
+    offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+    field = array('i', [-1]) * (maze.width * maze.height)
+    if target < 0 or not maze.is_valid_position(maze.cell_position(target)):
+        return field, 0
+    field[target] = 0
+    queue = deque([target])
+    nodes_expanded = 0
+    while queue:
+        current = queue.popleft()
+        nodes_expanded += 1
+        next_distance = field[current] + 1
+        for neighbor in neighbor_ids[offsets[current]:offsets[current + 1]]:
+            if field[neighbor] < 0:
+                field[neighbor] = next_distance
+                queue.append(neighbor)
+    return field, nodes_expanded
+
+
+class DistanceFieldCache:
+    """Per-target distance fields shared by every ghost chasing the same cell.
+
+    Fields live in an LRU cache bounded by max_bytes. For small maps,
+    precompute_all_pairs() stores one field per open cell up front so every
+    lookup is O(1) and never searches again.
+    """
+
+    def __init__(self, maze, max_bytes=16 * 1024 * 1024):
+        self.maze = maze
+        self.max_bytes = max_bytes
+        self.fields = OrderedDict()
+        self.bytes_used = 0
+        self.all_pairs = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_nodes_expanded = 0
+
+    def precompute_all_pairs(self, max_bytes=64 * 1024 * 1024):
+        """Build the full distance table; raises ValueError if it would not fit in max_bytes"""
+        cells = self.maze.width * self.maze.height
+        targets = [cell for cell in range(cells)
+                   if self.maze.is_valid_position(self.maze.cell_position(cell))]
+        table_bytes = len(targets) * cells * array('i').itemsize
+        if table_bytes > max_bytes:
+            raise ValueError(f"All-pairs table needs {table_bytes} bytes, budget is {max_bytes}")
+        self.all_pairs = {target: bfs_distance_field(self.maze, target)[0] for target in targets}
+
+    def get(self, target):
+        """Distance field for a target cell id, searching only on a cache miss"""
+        if self.all_pairs is not None and target in self.all_pairs:
+            self.hits += 1
+            self.last_nodes_expanded = 0
+            return self.all_pairs[target]
+
+        field = self.fields.get(target)
+        if field is not None:
+            self.fields.move_to_end(target)
+            self.hits += 1
+            self.last_nodes_expanded = 0
+            return field
+
+        self.misses += 1
+        field, self.last_nodes_expanded = bfs_distance_field(self.maze, target)
+        self.fields[target] = field
+        self.bytes_used += len(field) * field.itemsize
+        # Evict least recently used fields, but always keep the one just built
+        while self.bytes_used > self.max_bytes and len(self.fields) > 1:
+            _, evicted = self.fields.popitem(last=False)
+            self.bytes_used -= len(evicted) * evicted.itemsize
+            self.evictions += 1
+        return field
+
+    def next_step(self, position, target_position):
+        """Neighbor one move closer to the target, or None when already there or unreachable"""
+        maze = self.maze
+        field = self.get(maze.cell_id(target_position))
+        cell = maze.cell_id(position)
+        distance = field[cell] if cell >= 0 else -1
+        if distance <= 0:
+            return None
+        offsets = maze.neighbor_offsets
+        for neighbor in maze.neighbor_ids[offsets[cell]:offsets[cell + 1]]:
+            if field[neighbor] == distance - 1:
+                return maze.cell_position(neighbor)
+        return None
+
+    def path_to(self, position, target_position):
+        """Shortest path (start excluded) found by descending the target's distance field"""
+        maze = self.maze
+        field = self.get(maze.cell_id(target_position))
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        cell = maze.cell_id(position)
+        if cell < 0 or field[cell] < 0:
+            return []
+        path = []
+        while field[cell] > 0:
+            distance = field[cell]
+            for neighbor in neighbor_ids[offsets[cell]:offsets[cell + 1]]:
+                if field[neighbor] == distance - 1:
+                    cell = neighbor
+                    break
+            path.append(cell)
+        return maze.cell_positions(path)
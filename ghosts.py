@@ -0,0 +1,796 @@
+import copy
+import heapq
+import itertools
+import math
+from collections import deque
+
+from constants import BLUE, PINK, ORANGE, RED, CYAN, PURPLE, GREEN, MAGENTA
+from distance_field import DistanceFieldCache
+from instrumentation import Instrumentation, SAMPLED
+from jump_points import DIRECTIONS, jump
+from priority_queues import QUEUES
+
+
+def reconstruct_path(came_from, goal):
+    """Follow the parent map back from goal (the start cell maps to None and is not included)"""
+    path = []
+    node = goal
+    while came_from[node] is not None:
+        path.append(node)
+        node = came_from[node]
+    path.reverse()
+    return path
+
+
+class Character:
+    def __init__(self, position):
+        self.position = position
+        self.previous_position = position
+        self.spawn_position = position  # where a reset puts the character back
+
+
+class PacMan(Character):
+    def __init__(self, position):
+        super().__init__(position)
+
+    def move(self, direction, maze):
+        dx, dy = direction
+        new_position = (self.position[0] + dx, self.position[1] + dy)
+        if maze.is_valid_position(new_position):
+            self.previous_position = self.position
+            self.position = new_position
+            return True
+        return False
+
+
+class Ghost(Character):
+    instrumentation = Instrumentation()  # shared by all ghosts unless overridden per instance
+    repair_excess = 2  # steps a repaired path may be longer than the shortest one; None always searches
+    optimal = True  # search() finds shortest paths
+
+    def __init__(self, position, color, name):
+        super().__init__(position)
+        self.color = color
+        self.name = name
+        self.path = deque()  # positions still to walk; popleft() keeps each move O(1)
+        self.metrics = {
+            "search_time": 0,
+            "memory_usage": 0,
+            "nodes_expanded": 0
+        }
+        self.last_target_position = None  # Track the last target position
+        self.path_excess = math.inf  # upper bound on how much longer the path is than the shortest
+        self.repair_hits = 0  # target changes handled by repair_path instead of a search
+        self.repair_misses = 0
+
+    def find_path(self, maze, target_position):
+        # Measurement lives here once; the ghost classes only implement search()
+        with self.instrumentation.measure() as measurement:
+            nodes_expanded = self.search(maze, target_position)
+
+        memory_usage = measurement.memory_usage
+        if memory_usage is None and self.instrumentation.mode == SAMPLED:
+            memory_usage = self.metrics["memory_usage"]  # keep the last sample
+
+        self.metrics = {
+            "search_time": measurement.search_time,
+            "memory_usage": memory_usage,  # KB, None when not measured
+            "nodes_expanded": nodes_expanded
+        }
+        return self.metrics
+
+    def search(self, maze, target_position):
+        # Each ghost class implements its algorithm here: set self.path and
+        # return the number of nodes expanded
+        return 0
+
+    def move(self, maze):
+        if self.path:
+            next_position = self.path.popleft()
+            if maze.is_valid_position(next_position):
+                self.previous_position = self.position
+                self.position = next_position
+                return True
+        return False
+
+    def path_end(self):
+        # Where the current plan leads, None without a plan
+        return self.path[-1] if self.path else None
+
+    def finish_path(self, maze):
+        """Plan out whatever search() left for move() to do, adding its cost to self.metrics"""
+        return self.metrics
+
+    def planning_copy(self):
+        """Independent copy that a background planner (planner.py) can search with"""
+        return copy.deepcopy(self)
+
+    def set_maze(self, maze):
+        # Called on a planning copy unpickled in a planner process, with that process's maze
+        pass
+
+    def update_path(self, maze, target_position):
+        if target_position != self.last_target_position:
+            if self.repair_path(maze, target_position):
+                self.repair_hits += 1
+                self.last_target_position = target_position
+                return
+            self.repair_misses += 1
+            self.last_target_position = target_position
+            self.find_path(maze, target_position)
+            found = self.position == target_position or self.path_end() == target_position
+            self.path_excess = 0 if found and self.optimal else math.inf
+
+    def repair_path(self, maze, target_position):
+        """Reuse the path when the target moved onto it or next to it; False if a search is needed.
+
+        The target is cut out of the path where it lies on it, or appended after
+        the first path cell next to it. Each repair can only add two steps over
+        the shortest path (adjacent cells are one move apart), so path_excess
+        bounds the total and a repair beyond repair_excess searches instead.
+        """
+        if self.repair_excess is None or self.last_target_position is None:
+            return False
+        path = self.path
+        if (path[-1] if path else self.position) != self.last_target_position:
+            return False  # the path does not lead to the last target (partial or stale plan)
+        if path and path[0] == self.position:
+            return False  # a collision revert made the ghost wait a step
+        if not maze.is_valid_position(target_position):
+            return False
+
+        target_x, target_y = target_position
+        x, y = self.position
+        if (x, y) == target_position:
+            self.path = deque()
+            self.path_excess = 0
+            return True
+
+        # Shortest repair: stop on the target (length k + 1) or detour from the
+        # first cell next to it (length k + 2); index -1 is the ghost's own cell
+        trim = detour = None
+        if abs(x - target_x) + abs(y - target_y) == 1:
+            detour = -1
+        for k, (x, y) in enumerate(path):
+            if (x, y) == target_position:
+                trim = k
+                break
+            if detour is None and abs(x - target_x) + abs(y - target_y) == 1:
+                detour = k
+        if trim is not None and (detour is None or trim + 1 <= detour + 2):
+            length, excess = trim + 1, self.path_excess
+        elif detour is not None:
+            length, excess = detour + 2, self.path_excess + 2
+        else:
+            return False
+
+        shortest_bound = abs(self.position[0] - target_x) + abs(self.position[1] - target_y)
+        excess = min(excess, length - shortest_bound)
+        if excess > self.repair_excess:
+            return False
+        repaired = deque(itertools.islice(path, length - 1 if trim is None else length))
+        if trim is None:
+            repaired.append(target_position)
+        self.path = repaired
+        self.path_excess = excess
+        return True
+
+
+class BlueGhost(Ghost):
+    def __init__(self, position):
+        super().__init__(position, BLUE, "Blue (BFS)")
+
+    def search(self, maze, target_position):
+        # BFS implementation
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        queue = deque([start])
+        came_from = {start: None}  # parent map, also used as the visited set
+        nodes_expanded = 0
+
+        while queue:
+            current = queue.popleft()
+            nodes_expanded += 1
+
+            if current == target:
+                self.path = deque(maze.cell_positions(reconstruct_path(came_from, current)))
+                break
+
+            for next_cell in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                if next_cell not in came_from:
+                    came_from[next_cell] = current
+                    queue.append(next_cell)
+
+        return nodes_expanded
+
+
+class PinkGhost(Ghost):
+    optimal = False  # DFS paths can wander; repairs need the Manhattan bound to prove them short
+
+    def __init__(self, position):
+        super().__init__(position, PINK, "Pink (DFS)")
+
+    def search(self, maze, target_position):
+        # DFS implementation
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        stack = [start]
+        came_from = {start: None}  # parent map, also used as the visited set
+        nodes_expanded = 0
+
+        while stack:
+            current = stack.pop()
+            nodes_expanded += 1
+
+            if current == target:
+                self.path = deque(maze.cell_positions(reconstruct_path(came_from, current)))
+                break
+
+            for next_cell in reversed(neighbor_ids[offsets[current]:offsets[current + 1]]):  # reversed để thứ tự gần giống BFS
+                if next_cell not in came_from:
+                    came_from[next_cell] = current
+                    stack.append(next_cell)
+
+        return nodes_expanded
+
+
+
+class OrangeGhost(Ghost):
+    def __init__(self, position, queue="heap"):
+        super().__init__(position, ORANGE, "Orange (UCS)" if queue == "heap" else f"Orange (UCS, {queue} queue)")
+        self.queue = QUEUES[queue]  # frontier functions, see priority_queues.py
+
+    def search(self, maze, target_position):
+        # UCS implementation
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        width, height = maze.width, maze.height
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        new_queue, push, pop = self.queue
+        frontier = new_queue()
+        # (cost, column-major index, cell) pops cells in the order of the original (cost, (x, y), trail)
+        # entries. Instead of comparing whole trails (which recursed once per cell), every cell keeps the
+        # parent whose own trail sorts first, so the path is still the smallest trail among equal costs
+        push(frontier, (0, 0, start))
+        came_from = {}  # parent of each expanded cell, also used as the visited set
+        reached = {start: (0, None)}  # cell reached at the next cost -> (rank of its best parent, that parent)
+        settling = {}  # the same for the cells at the cost being expanded
+        rank = {}  # cell at the cost being expanded -> position of its trail among that cost's trails
+        layer_cost = -1
+        nodes_expanded = 0
+
+        while frontier:
+            cost, _, current = pop(frontier)
+            nodes_expanded += 1
+
+            if current in came_from:
+                continue
+            if cost != layer_cost:
+                # Every route to this cost is known now; rank its trails by parent trail, then position
+                layer_cost = cost
+                settling, reached = reached, {}
+                layer = sorted((parent_rank, (cell % width) * height + cell // width, cell)
+                               for cell, (parent_rank, _) in settling.items() if cell not in came_from)
+                rank = {cell: i for i, (_, _, cell) in enumerate(layer)}
+            came_from[current] = settling[current][1]
+
+            if current == target:
+                self.path = deque(maze.cell_positions(reconstruct_path(came_from, current)))
+                break
+
+            route = (rank[current], current)
+            for neighbor in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                if neighbor not in came_from:
+                    if neighbor not in reached or route < reached[neighbor]:
+                        reached[neighbor] = route
+                    push(frontier, (cost + 1, (neighbor % width) * height + neighbor // width, neighbor))
+
+        return nodes_expanded
+
+
+class RedGhost(Ghost):
+    def __init__(self, position, queue="heap"):
+        super().__init__(position, RED, "Red (A*)" if queue == "heap" else f"Red (A*, {queue} queue)")
+        self.queue = QUEUES[queue]  # frontier functions, see priority_queues.py
+
+    def heuristic(self, a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    def search(self, maze, target_position):
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        width = maze.width
+        target_x, target_y = target_position
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+
+        new_queue, push, pop = self.queue
+        open_list = new_queue()
+        f_score = {start: self.heuristic(self.position, target_position)}
+        push(open_list, (f_score[start], start))
+        came_from = {start: None}
+        g_score = {start: 0}
+        visited = set()
+        nodes_expanded = 0
+
+        while open_list:
+            _, current = pop(open_list)
+            nodes_expanded += 1
+
+            if current in visited:
+                continue
+
+            visited.add(current)
+
+            if current == target:
+                self.path = deque(maze.cell_positions(reconstruct_path(came_from, current)))
+                break
+
+            for neighbor in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                tentative_g_score = g_score[current] + 1
+
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    # Manhattan heuristic straight on the cell id
+                    y, x = divmod(neighbor, width)
+                    f_score[neighbor] = tentative_g_score + abs(x - target_x) + abs(y - target_y)
+                    push(open_list, (f_score[neighbor], neighbor))
+
+        return nodes_expanded
+
+
+def join_paths(forward, backward, meet):
+    """Cells after the start up to meet from the forward parent map, then on to the goal along the backward one"""
+    path = reconstruct_path(forward, meet)
+    node = backward[meet]
+    while node is not None:
+        path.append(node)
+        node = backward[node]
+    return path
+
+
+class BidirectionalBlueGhost(BlueGhost):
+    def __init__(self, position):
+        super().__init__(position)
+        self.name = "Blue (Bidirectional BFS)"
+
+    def search(self, maze, target_position):
+        # Grow whole BFS layers from both ends, always the smaller frontier first.
+        # The first layer that touches the other side's visited cells closes a
+        # shortest path: every meeting found in that layer has the same length.
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        if start == target:
+            self.path = deque()
+            return 1
+
+        forward, backward = {start: None}, {target: None}  # parent maps, also the visited sets
+        forward_layer, backward_layer = [start], [target]
+        nodes_expanded = 0
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                layer, came_from, other = forward_layer, forward, backward
+            else:
+                layer, came_from, other = backward_layer, backward, forward
+
+            next_layer = []
+            meet = None
+            for current in layer:
+                nodes_expanded += 1
+                for next_cell in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                    if next_cell not in came_from:
+                        came_from[next_cell] = current
+                        next_layer.append(next_cell)
+                        if meet is None and next_cell in other:
+                            meet = next_cell
+
+            if meet is not None:
+                self.path = deque(maze.cell_positions(join_paths(forward, backward, meet)))
+                break
+
+            if layer is forward_layer:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+
+        return nodes_expanded
+
+
+class BidirectionalRedGhost(RedGhost):
+    def __init__(self, position):
+        super().__init__(position)
+        self.name = "Red (Bidirectional A*)"
+
+    def search(self, maze, target_position):
+        # NBA* (Pijls & Post): A* from both ends, each toward the other's root,
+        # expanding the smaller open list. A cell closed by either side is never
+        # expanded by the other. best is the shortest start-goal path seen where
+        # the two trees touch; a popped cell is rejected unaided when it cannot
+        # lead to anything shorter. The search ends when either open list runs
+        # out, and best is then optimal because Manhattan distance is consistent.
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        width = maze.width
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        if start == target:
+            self.path = deque()
+            return 1
+
+        sides = []
+        for root, toward in ((start, target), (target, start)):
+            toward_y, toward_x = divmod(toward, width)
+            root_y, root_x = divmod(root, width)
+            distance = abs(root_x - toward_x) + abs(root_y - toward_y)
+            sides.append({
+                "open_list": [(distance, root)],
+                "came_from": {root: None},
+                "g_score": {root: 0},
+                "toward": (toward_x, toward_y),
+                "lowest_f": distance,
+            })
+        forward, backward = sides
+        closed = set()  # shared by both sides
+        best = math.inf
+        meet = None
+        nodes_expanded = 0
+
+        while forward["open_list"] and backward["open_list"]:
+            if len(forward["open_list"]) <= len(backward["open_list"]):
+                side, other = forward, backward
+            else:
+                side, other = backward, forward
+            open_list = side["open_list"]
+            _, current = heapq.heappop(open_list)
+            nodes_expanded += 1
+
+            if current not in closed:
+                closed.add(current)
+                g_score, other_g_score = side["g_score"], other["g_score"]
+                toward_x, toward_y = side["toward"]
+                other_x, other_y = other["toward"]
+                y, x = divmod(current, width)
+                g = g_score[current]
+                # Expand only if a path through current could still beat best
+                if (g + abs(x - toward_x) + abs(y - toward_y) < best and
+                        g + other["lowest_f"] - abs(x - other_x) - abs(y - other_y) < best):
+                    for neighbor in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                        tentative_g_score = g + 1
+                        if neighbor in closed or (neighbor in g_score and tentative_g_score >= g_score[neighbor]):
+                            continue
+                        side["came_from"][neighbor] = current
+                        g_score[neighbor] = tentative_g_score
+                        y, x = divmod(neighbor, width)
+                        heapq.heappush(open_list, (tentative_g_score + abs(x - toward_x) + abs(y - toward_y), neighbor))
+                        if neighbor in other_g_score and tentative_g_score + other_g_score[neighbor] < best:
+                            best = tentative_g_score + other_g_score[neighbor]
+                            meet = neighbor
+
+            if open_list:
+                side["lowest_f"] = open_list[0][0]
+
+        if meet is not None:
+            self.path = deque(maze.cell_positions(join_paths(forward["came_from"], backward["came_from"], meet)))
+        return nodes_expanded
+
+
+class CyanGhost(Ghost):
+    def __init__(self, position, distance_fields):
+        super().__init__(position, CYAN, "Cyan (Distance field)")
+        self.distance_fields = distance_fields  # DistanceFieldCache shared with other ghosts
+
+    def planning_copy(self):
+        # Own cache for the copy: the shared one is not safe to use from worker threads
+        fields = self.distance_fields
+        return CyanGhost(self.position, DistanceFieldCache(fields.maze, fields.max_bytes))
+
+    def search(self, maze, target_position):
+        # Descend the target's cached distance field; only a cache miss runs a BFS
+        path = self.distance_fields.path_to(self.position, target_position)
+        if path or self.position == target_position:
+            self.path = deque(path)
+
+        return self.distance_fields.last_nodes_expanded
+
+
+class PurpleGhost(Ghost):
+    """Moving-target A* that keeps its search tree between calls (Fringe-Retrieving A* style).
+
+    The tree is rooted at the ghost. When only Pac-Man moves, closed cells keep their
+    exact g values, so the open list is re-keyed for the new target and the search
+    simply resumes, often with the target already closed. When the ghost steps to a
+    cell inside the tree, the subtree under that cell is kept (its distances are still
+    exact) and the open list is rebuilt from its fringe instead of starting over.
+    """
+
+    def __init__(self, position):
+        super().__init__(position, PURPLE, "Purple (Incremental A*)")
+        self.planner_maze = None
+
+    def planning_copy(self):
+        # Start from an empty search tree rather than copying this one
+        return PurpleGhost(self.position)
+
+    def reset_planner(self, maze, start):
+        self.planner_maze = maze
+        self.root = start
+        self.g_score = {start: 0}
+        self.came_from = {start: None}
+        self.closed = set()
+        self.open_list = [(0, start)]
+
+    def reroot(self, start):
+        # Keep the subtree under the new root; every distance in it drops by g(start)
+        maze = self.planner_maze
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        children = {}
+        for cell in self.closed:
+            parent = self.came_from[cell]
+            if parent is not None:
+                children.setdefault(parent, []).append(cell)
+
+        offset = self.g_score[start]
+        g_score = {start: 0}
+        came_from = {start: None}
+        subtree = [start]
+        for cell in subtree:
+            for child in children.get(cell, ()):
+                g_score[child] = self.g_score[child] - offset
+                came_from[child] = cell
+                subtree.append(child)
+        closed = set(subtree)
+
+        # Rebuild the open list from the fringe of the kept subtree
+        for cell in subtree:
+            tentative_g_score = g_score[cell] + 1
+            for neighbor in neighbor_ids[offsets[cell]:offsets[cell + 1]]:
+                if neighbor not in closed and tentative_g_score < g_score.get(neighbor, math.inf):
+                    g_score[neighbor] = tentative_g_score
+                    came_from[neighbor] = cell
+
+        self.root = start
+        self.g_score = g_score
+        self.came_from = came_from
+        self.closed = closed
+        self.open_list = [(0, cell) for cell in g_score if cell not in closed]
+
+    def rekey(self, target_position):
+        # h changed with the target: recompute every open f value and re-heapify
+        width = self.planner_maze.width
+        target_x, target_y = target_position
+        open_cells = {cell for _, cell in self.open_list if cell not in self.closed}
+        self.open_list = []
+        for cell in open_cells:
+            y, x = divmod(cell, width)
+            self.open_list.append((self.g_score[cell] + abs(x - target_x) + abs(y - target_y), cell))
+        heapq.heapify(self.open_list)
+
+    def search(self, maze, target_position):
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        if maze is not self.planner_maze or start not in self.closed:
+            self.reset_planner(maze, start)
+        elif start != self.root:
+            self.reroot(start)
+        self.rekey(target_position)
+
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        width = maze.width
+        target_x, target_y = target_position
+        g_score, came_from, closed, open_list = self.g_score, self.came_from, self.closed, self.open_list
+        nodes_expanded = 0
+
+        while target not in closed and open_list:
+            f, current = heapq.heappop(open_list)
+            if current in closed:
+                continue
+            y, x = divmod(current, width)
+            if f != g_score[current] + abs(x - target_x) + abs(y - target_y):
+                continue  # stale entry, the cell was pushed again with a lower g
+            nodes_expanded += 1
+            closed.add(current)
+
+            # Relax the neighbors even of the target: a closed cell must have its whole
+            # fringe on the open list, or resuming later would miss routes through it
+            for neighbor in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                tentative_g_score = g_score[current] + 1
+                if neighbor not in closed and tentative_g_score < g_score.get(neighbor, math.inf):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    y, x = divmod(neighbor, width)
+                    heapq.heappush(open_list, (tentative_g_score + abs(x - target_x) + abs(y - target_y), neighbor))
+
+        if target in closed:
+            self.path = deque(maze.cell_positions(reconstruct_path(came_from, target)))
+
+        return nodes_expanded
+
+
+class GreenGhost(Ghost):
+    optimal = False  # abstract paths can be slightly longer than the shortest one
+
+    def __init__(self, position, hierarchy):
+        super().__init__(position, GREEN, "Green (HPA*)")
+        self.hierarchy = hierarchy  # ClusterGraph shared by every ghost on the maze
+        self.waypoints = deque()  # abstract path cells not refined yet
+        self.refined_to = None  # cell the refined path currently ends at
+
+    def planning_copy(self):
+        # The cluster graph is read-only once built, so copies can share it
+        return GreenGhost(self.position, self.hierarchy)
+
+    def path_end(self):
+        if self.waypoints:
+            return self.hierarchy.maze.cell_position(self.waypoints[-1])
+        return super().path_end()
+
+    def search(self, maze, target_position):
+        # Search the cluster graph and refine only its first edge; move()
+        # refines the next edge once the ghost has walked the previous one
+        start = maze.cell_id(self.position)
+        waypoints, nodes_expanded = self.hierarchy.search(start, maze.cell_id(target_position))
+        if waypoints:
+            self.path = deque()
+            self.waypoints = deque(waypoints[1:])
+            self.refined_to = start
+            nodes_expanded += self.refine_next(maze)
+        return nodes_expanded
+
+    def refine_next(self, maze):
+        if not self.waypoints:
+            return 0
+        waypoint = self.waypoints.popleft()
+        cells, nodes_expanded = self.hierarchy.refine(self.refined_to, waypoint)
+        self.path.extend(maze.cell_positions(cells))
+        self.refined_to = waypoint
+        return nodes_expanded
+
+    def refine(self, maze, edges):
+        # Deferred refinement is part of the search's cost, so it is measured into the same metrics
+        with self.instrumentation.measure() as measurement:
+            nodes_expanded = sum(self.refine_next(maze) for _ in range(edges))
+        self.metrics["search_time"] += measurement.search_time
+        self.metrics["nodes_expanded"] += nodes_expanded
+        if measurement.memory_usage is not None:
+            self.metrics["memory_usage"] = max(self.metrics["memory_usage"] or 0, measurement.memory_usage)
+        return self.metrics
+
+    def finish_path(self, maze):
+        return self.refine(maze, len(self.waypoints))
+
+    def move(self, maze):
+        if not self.path and self.waypoints:
+            self.refine(maze, 1)
+        return super().move(maze)
+
+
+class MagentaGhost(Ghost):
+    """A* over jump points (4-connected Jump Point Search).
+
+    Every move costs 1, so the many equally short orderings of moves through an
+    open area are pruned: a scan keeps going straight and only cells where a
+    turn can matter (jump points) reach the open list. With a JumpTable the
+    scans are table lookups (JPS+) instead of walking the grid.
+    """
+
+    def __init__(self, position, jump_table=None):
+        super().__init__(position, MAGENTA, "Magenta (JPS+)" if jump_table else "Magenta (JPS)")
+        self.jump_table = jump_table  # JumpTable shared by every ghost on the maze, or None to scan
+
+    def planning_copy(self):
+        # The jump table is read-only once built, so copies can share it
+        return MagentaGhost(self.position, self.jump_table)
+
+    def search(self, maze, target_position):
+        width = maze.width
+        target_x, target_y = target_position
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        scan = self.jump_table.jump if self.jump_table else lambda cell, direction, goal: jump(maze, cell, direction, goal)
+
+        open_list = [(0, start)]
+        came_from = {start: None}
+        g_score = {start: 0}
+        visited = set()
+        nodes_expanded = 0
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            nodes_expanded += 1
+            if current in visited:
+                continue
+            visited.add(current)
+
+            if current == target:
+                self.path = deque(maze.cell_positions(self.walk(reconstruct_path(came_from, current), start, width)))
+                break
+
+            # Keep going straight or turn; never head back toward the parent
+            parent = came_from[current]
+            if parent is None:
+                directions = DIRECTIONS
+            elif abs(current - parent) < width:
+                dx = 1 if current > parent else -1
+                directions = [(dx, 0), (0, 1), (0, -1)]
+            else:
+                dy = 1 if current > parent else -1
+                directions = [(0, dy), (1, 0), (-1, 0)]
+
+            for direction in directions:
+                jump_point = scan(current, direction, target)
+                if jump_point < 0:
+                    continue
+                tentative_g_score = g_score[current] + abs(jump_point - current) // (width if direction[1] else 1)
+                if jump_point not in g_score or tentative_g_score < g_score[jump_point]:
+                    came_from[jump_point] = current
+                    g_score[jump_point] = tentative_g_score
+                    y, x = divmod(jump_point, width)
+                    heapq.heappush(open_list, (tentative_g_score + abs(x - target_x) + abs(y - target_y), jump_point))
+
+        return nodes_expanded
+
+    def walk(self, jump_points, start, width):
+        # Jump points are joined by straight runs; fill in the cells between them
+        cells = []
+        current = start
+        for jump_point in jump_points:
+            step = (1 if jump_point > current else -1) * (1 if abs(jump_point - current) < width else width)
+            cells.extend(range(current + step, jump_point + step, step))
+            current = jump_point
+        return cells
+
+
+class CorridorGhost(Ghost):
+    """BFS, DFS, UCS or A* run on a CorridorGraph instead of cell by cell.
+
+    Corridor edges are weighted by their length, so the BFS counterpart is
+    Dial's algorithm (bucket queue Dijkstra) and only DFS stays unweighted.
+    metrics["cells_covered"] counts the cells under the nodes and corridors the
+    search reached, for comparison with the node counts of the per-cell ghosts.
+    """
+
+    # method: (color, name)
+    METHODS = {
+        "bfs": (BLUE, "Blue (corridor BFS)"),
+        "dfs": (PINK, "Pink (corridor DFS)"),
+        "ucs": (ORANGE, "Orange (corridor UCS)"),
+        "astar": (RED, "Red (corridor A*)"),
+    }
+
+    def __init__(self, position, corridors, method="ucs"):
+        color, name = self.METHODS[method]
+        super().__init__(position, color, name)
+        self.corridors = corridors  # CorridorGraph shared by every ghost on the maze
+        self.method = method
+        self.optimal = method != "dfs"
+        self.cells_covered = 0
+
+    def planning_copy(self):
+        # The corridor graph is read-only once built, so copies can share it
+        return CorridorGhost(self.position, self.corridors, self.method)
+
+    def set_maze(self, maze):
+        self.corridors.set_maze(maze)  # pickling dropped the graph's maze
+
+    def find_path(self, maze, target_position):
+        metrics = super().find_path(maze, target_position)
+        metrics["cells_covered"] = self.cells_covered
+        return metrics
+
+    def search(self, maze, target_position):
+        if not (maze.is_valid_position(self.position) and maze.is_valid_position(target_position)):
+            return 0
+        start = maze.cell_id(self.position)
+        target = maze.cell_id(target_position)
+        if self.method == "dfs":
+            cells, nodes_expanded, self.cells_covered = self.corridors.depth_first(start, target)
+        else:
+            queue = "bucket" if self.method == "bfs" else "heap"
+            cells, nodes_expanded, self.cells_covered = self.corridors.search(start, target, queue,
+                                                                             heuristic=self.method == "astar")
+        if cells or start == target:
+            self.path = deque(maze.cell_positions(cells))
+        return nodes_expanded
@@ -0,0 +1,166 @@
+import heapq
+from array import array
+from collections import deque
+from itertools import chain
+
+from constants import PATH
+
+
+class ClusterGraph:
+    """HPA* abstraction of a Maze: square clusters linked through entrance cells.
+
+    Every border between two clusters is scanned once for entrances. A run of
+    open cells facing open cells across the border gets one transition in its
+    middle, or one at each end when it is at least long_entrance cells long.
+    A BFS kept inside each cluster then stores the distance between every pair
+    of its entrance cells. Searches run on this small graph, and refine() turns
+    one abstract edge back into cells only when a ghost needs it.
+    """
+
+    def __init__(self, maze, cluster_size=16, long_entrance=6):
+        self.maze = maze
+        self.cluster_size = cluster_size
+        self.long_entrance = long_entrance
+        self.columns = -(-maze.width // cluster_size)
+        # Cluster id of every cell, so bounded searches test membership with one lookup
+        self.cluster_ids = array('i')
+        for y in range(maze.height):
+            row_base = (y // cluster_size) * self.columns
+            self.cluster_ids.extend([row_base + x // cluster_size for x in range(maze.width)])
+        self.entrances = {}  # cluster id -> entrance cell ids
+        self.edges = {}  # entrance cell id -> [(neighbor cell id, cost)]
+        self.nodes_expanded = 0  # BFS work spent building the graph
+        self.build()
+
+    def cluster_of(self, cell):
+        return self.cluster_ids[cell]
+
+    def build(self):
+        maze, size = self.maze, self.cluster_size
+        width, height, cells = maze.width, maze.height, maze.cells
+
+        # Vertical borders: column x - 1 faces column x
+        for x in range(size, width, size):
+            for y0 in range(0, height, size):
+                self.add_entrances([(y * width + x - 1, y * width + x)
+                                    for y in range(y0, min(y0 + size, height))], cells)
+        # Horizontal borders: row y - 1 faces row y
+        for y in range(size, height, size):
+            for x0 in range(0, width, size):
+                self.add_entrances([((y - 1) * width + x, y * width + x)
+                                    for x in range(x0, min(x0 + size, width))], cells)
+
+        for cluster, entrances in self.entrances.items():
+            for entrance in entrances:
+                _, distance, nodes_expanded = self.cluster_bfs(entrance, cluster)
+                self.nodes_expanded += nodes_expanded
+                for other in entrances:
+                    if other != entrance and other in distance:
+                        self.edges[entrance].append((other, distance[other]))
+
+    def add_entrances(self, border, cells):
+        """Split one cluster border (pairs of facing cells) into entrances"""
+        run = []
+        for a, b in border + [(None, None)]:
+            if a is not None and cells[a] == PATH and cells[b] == PATH:
+                run.append((a, b))
+                continue
+            if run:
+                if len(run) >= self.long_entrance:
+                    self.add_transition(*run[0])
+                    self.add_transition(*run[-1])
+                else:
+                    self.add_transition(*run[len(run) // 2])
+                run = []
+
+    def add_transition(self, a, b):
+        for cell, other in ((a, b), (b, a)):
+            entrances = self.entrances.setdefault(self.cluster_of(cell), [])
+            if cell not in entrances:
+                entrances.append(cell)
+                self.edges[cell] = []
+            self.edges[cell].append((other, 1))
+
+    def cluster_bfs(self, start, cluster, goal=-1):
+        """BFS from start that never leaves cluster; returns (parent map, distances, nodes expanded)"""
+        offsets, neighbor_ids = self.maze.neighbor_offsets, self.maze.neighbor_ids
+        cluster_ids = self.cluster_ids
+        came_from = {start: None}
+        distance = {start: 0}
+        queue = deque([start])
+        nodes_expanded = 0
+        while queue:
+            current = queue.popleft()
+            nodes_expanded += 1
+            if current == goal:
+                break
+            for neighbor in neighbor_ids[offsets[current]:offsets[current + 1]]:
+                if neighbor not in came_from and cluster_ids[neighbor] == cluster:
+                    came_from[neighbor] = current
+                    distance[neighbor] = distance[current] + 1
+                    queue.append(neighbor)
+        return came_from, distance, nodes_expanded
+
+    def search(self, start, goal):
+        """A* over the entrance graph between two cell ids.
+
+        Returns the abstract path as cell ids (start first, [] if unreachable)
+        and the nodes expanded, counting the BFS that links start and goal to
+        the entrances of their clusters.
+        """
+        if start == goal:
+            return [start], 0
+        width = self.maze.width
+        goal_y, goal_x = divmod(goal, width)
+
+        # Temporary edges from start and goal to their cluster's entrances
+        extra = {}
+        nodes_expanded = 0
+        for node in (start, goal):
+            cluster = self.cluster_of(node)
+            _, distance, expanded = self.cluster_bfs(node, cluster)
+            nodes_expanded += expanded
+            for entrance in self.entrances.get(cluster, ()):
+                if entrance != node and entrance in distance:
+                    extra.setdefault(node, []).append((entrance, distance[entrance]))
+                    extra.setdefault(entrance, []).append((node, distance[entrance]))
+            if node == start and goal in distance:
+                extra.setdefault(start, []).append((goal, distance[goal]))  # same cluster, direct route
+
+        open_list = [(0, 0, start)]
+        came_from = {start: None}
+        g_score = {start: 0}
+        while open_list:
+            _, cost, current = heapq.heappop(open_list)
+            if cost > g_score[current]:
+                continue
+            nodes_expanded += 1
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path, nodes_expanded
+            for neighbor, step in chain(self.edges.get(current, ()), extra.get(current, ())):
+                tentative_g_score = cost + step
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    y, x = divmod(neighbor, width)
+                    heapq.heappush(open_list, (tentative_g_score + abs(x - goal_x) + abs(y - goal_y),
+                                               tentative_g_score, neighbor))
+        return [], nodes_expanded
+
+    def refine(self, a, b):
+        """Cells (a excluded) along one abstract edge; returns (cells, nodes expanded)"""
+        cluster = self.cluster_of(a)
+        if self.cluster_of(b) != cluster:
+            return [b], 0  # transition across a border, always a single step
+        came_from, _, nodes_expanded = self.cluster_bfs(a, cluster, b)
+        cells = []
+        while b != a:
+            cells.append(b)
+            b = came_from[b]
+        cells.reverse()
+        return cells, nodes_expanded
@@ -0,0 +1,189 @@
+import csv
+import json
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+# Instrumentation modes
+OFF = "off"          # measure nothing
+TIMING = "timing"    # wall time only (perf_counter_ns), near-zero cost
+SAMPLED = "sampled"  # timing, plus tracemalloc on one search out of every sample_every
+FULL = "full"        # timing and tracemalloc on every search
+MODES = (OFF, TIMING, SAMPLED, FULL)
+
+
+class Measurement:
+    """Context manager that times (and optionally memory-traces) one search"""
+
+    __slots__ = ("timed", "traced", "search_time", "memory_usage", "start_ns", "started_tracing", "base_memory")
+
+    def __init__(self, timed, traced):
+        self.timed = timed
+        self.traced = traced
+        self.search_time = 0
+        self.memory_usage = None  # KB, None when memory was not traced
+
+    def __enter__(self):
+        if self.traced:
+            # Nest inside tracing someone else started instead of stopping it on exit
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+            self.base_memory = tracemalloc.get_traced_memory()[0]
+        if self.timed:
+            self.start_ns = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.timed:
+            self.search_time = (perf_counter_ns() - self.start_ns) / 1e9
+        if self.traced:
+            peak = tracemalloc.get_traced_memory()[1]
+            if self.started_tracing:
+                tracemalloc.stop()
+            # Clamped: with searches on several threads another one may stop tracing first
+            self.memory_usage = max(0, peak - self.base_memory) / 1024  # Convert to KB
+        return False
+
+
+class Instrumentation:
+    def __init__(self, mode=TIMING, sample_every=16):
+        if mode not in MODES:
+            raise ValueError(f"Unknown instrumentation mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.sample_every = sample_every
+        self.searches = 0
+
+    def measure(self):
+        self.searches += 1
+        traced = self.mode == FULL or (self.mode == SAMPLED and self.searches % self.sample_every == 1)
+        return Measurement(self.mode != OFF, traced)
+
+    def next_mode(self):
+        """Cycle off -> timing -> sampled -> full (used by the in-game hotkey)"""
+        self.mode = MODES[(MODES.index(self.mode) + 1) % len(MODES)]
+        return self.mode
+
+
+NO_PHASE = nullcontext()  # what a disabled FrameProfiler hands out
+
+
+class PhaseTimer:
+    __slots__ = ("profiler", "name", "start_ns")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.stack.append(self.name)
+        self.start_ns = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.profiler.samples[self.name].append(perf_counter_ns() - self.start_ns)
+        self.profiler.stack.pop()
+        return False
+
+
+class FrameProfiler:
+    """Rolling per-phase timings of the game loop.
+
+    Each phase keeps its last window durations, so percentiles and histograms
+    describe recent frames only. Phases may nest (a ghost's planning inside
+    update); summary() lists every phase under the one it first ran inside.
+    While disabled, phase() returns a shared no-op context.
+    """
+
+    BUCKETS_MS = (0.25, 0.5, 1, 2, 4, 8, 16, 33)  # histogram upper edges; one more bucket holds the rest
+
+    def __init__(self, window=300, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}  # phase -> deque of durations in ns, in the order phases first ran
+        self.parents = {}  # phase -> enclosing phase when it first ran, None at the top
+        self.stack = []  # phases running right now
+        self.frames = 0
+
+    def phase(self, name):
+        if not self.enabled:
+            return NO_PHASE
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+            self.parents[name] = self.stack[-1] if self.stack else None
+        return PhaseTimer(self, name)
+
+    def end_frame(self):
+        if self.enabled:
+            self.frames += 1
+
+    def clear(self):
+        self.samples.clear()
+        self.parents.clear()
+        self.frames = 0
+
+    def histogram(self, name):
+        counts = [0] * (len(self.BUCKETS_MS) + 1)
+        for duration in self.samples.get(name, ()):
+            milliseconds = duration / 1e6
+            bucket = 0
+            while bucket < len(self.BUCKETS_MS) and milliseconds > self.BUCKETS_MS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    def phase_tree(self):
+        """(phase, depth) pairs, each phase followed by the ones nested in it"""
+        children = {}
+        for name, parent in self.parents.items():
+            children.setdefault(parent, []).append(name)
+        order = []
+        pending = [(name, 0) for name in reversed(children.get(None, []))]
+        while pending:
+            name, depth = pending.pop()
+            order.append((name, depth))
+            pending.extend((child, depth + 1) for child in reversed(children.get(name, [])))
+        return order
+
+    def summary(self):
+        """{phase: {depth, count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms, histogram}} over the window"""
+        stats = {}
+        for name, depth in self.phase_tree():
+            values = sorted(self.samples[name])
+            if not values:
+                continue
+
+            def at(p):
+                return values[min(len(values) - 1, int(len(values) * p / 100))] / 1e6
+
+            stats[name] = {
+                "depth": depth,
+                "count": len(values),
+                "mean_ms": sum(values) / len(values) / 1e6,
+                "p50_ms": at(50),
+                "p95_ms": at(95),
+                "p99_ms": at(99),
+                "max_ms": values[-1] / 1e6,
+                "histogram": self.histogram(name),
+            }
+        return stats
+
+    def export(self, path):
+        """Write summary() as .json, or as .csv with one row per phase"""
+        stats = self.summary()
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"frames": self.frames, "window": self.window,
+                           "buckets_ms": list(self.BUCKETS_MS), "phases": stats}, file, indent=2)
+            return
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            buckets = [f"le_{edge}ms" for edge in self.BUCKETS_MS] + [f"gt_{self.BUCKETS_MS[-1]}ms"]
+            writer.writerow(["phase", "depth", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"] + buckets)
+            for name, phase in stats.items():
+                writer.writerow([name, phase["depth"], phase["count"]] +
+                                [round(phase[key], 4) for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")] +
+                                phase["histogram"])
@@ -0,0 +1,127 @@
+from array import array
+
+from constants import PATH
+
+# Scan directions, indexing JumpTable.jumps
+EAST, WEST, SOUTH, NORTH = 0, 1, 2, 3
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
+
+def open_cell(maze, x, y):
+    return 0 <= x < maze.width and 0 <= y < maze.height and maze.cells[y * maze.width + x] == PATH
+
+
+def forced(maze, x, y, dx, dy):
+    """True when a cell entered moving (dx, dy) has a neighbor that only a turn here reaches optimally"""
+    if dx:
+        return ((open_cell(maze, x, y - 1) and not open_cell(maze, x - dx, y - 1)) or
+                (open_cell(maze, x, y + 1) and not open_cell(maze, x - dx, y + 1)))
+    return ((open_cell(maze, x - 1, y) and not open_cell(maze, x - 1, y - dy)) or
+            (open_cell(maze, x + 1, y) and not open_cell(maze, x + 1, y - dy)))
+
+
+def jump(maze, cell, direction, goal):
+    """Scan from cell in a direction (4-connected JPS); returns the next jump point's cell id, or -1.
+
+    Horizontal scans stop at the goal or a cell with a forced neighbor.
+    Vertical scans also stop where a horizontal scan would find a jump point.
+    """
+    cells, width, height = maze.cells, maze.width, maze.height
+    dx, dy = direction
+    y, x = divmod(cell, width)
+    while True:
+        x += dx
+        y += dy
+        if not (0 <= x < width and 0 <= y < height) or cells[y * width + x] != PATH:
+            return -1
+        cell = y * width + x
+        if cell == goal:
+            return cell
+        if dx:
+            # Open above/below here but blocked above/below the previous cell
+            behind = cell - dx
+            if ((y > 0 and cells[cell - width] == PATH and cells[behind - width] != PATH) or
+                    (y < height - 1 and cells[cell + width] == PATH and cells[behind + width] != PATH)):
+                return cell
+        else:
+            behind = cell - dy * width
+            if ((x > 0 and cells[cell - 1] == PATH and cells[behind - 1] != PATH) or
+                    (x < width - 1 and cells[cell + 1] == PATH and cells[behind + 1] != PATH)):
+                return cell
+            if jump(maze, cell, (1, 0), goal) >= 0 or jump(maze, cell, (-1, 0), goal) >= 0:
+                return cell
+
+
+class JumpTable:
+    """Precomputed jump distances for JPS+.
+
+    jumps[direction][cell] > 0 is the distance to the next jump point in that
+    direction; otherwise minus it is the number of open cells before a wall.
+    Only the goal is not known in advance, so jump() checks whether a scan
+    passes it (or, moving vertically, passes the goal's row with a clear view
+    along it).
+    """
+
+    def __init__(self, maze):
+        self.maze = maze
+        self.jumps = [array('i', [0]) * (maze.width * maze.height) for _ in DIRECTIONS]
+        self.build()
+
+    def build(self):
+        maze = self.maze
+        width, height = maze.width, maze.height
+        east, west = self.jumps[EAST], self.jumps[WEST]
+        for y in range(height):
+            for dx, table, xs in ((1, east, range(width - 1, -1, -1)), (-1, west, range(width))):
+                for x in xs:
+                    self.fill(table, x, y, dx, 0)
+
+        # Vertical jump points also include cells a horizontal scan leaves from successfully
+        south, north = self.jumps[SOUTH], self.jumps[NORTH]
+        for x in range(width):
+            for dy, table, ys in ((1, south, range(height - 1, -1, -1)), (-1, north, range(height))):
+                for y in ys:
+                    self.fill(table, x, y, 0, dy)
+
+    def fill(self, table, x, y, dx, dy):
+        maze = self.maze
+        if not open_cell(maze, x, y):
+            return
+        next_x, next_y = x + dx, y + dy
+        if not open_cell(maze, next_x, next_y):
+            table[y * maze.width + x] = 0
+            return
+        next_cell = next_y * maze.width + next_x
+        if forced(maze, next_x, next_y, dx, dy) or (dy and (self.jumps[EAST][next_cell] > 0 or
+                                                              self.jumps[WEST][next_cell] > 0)):
+            table[y * maze.width + x] = 1
+        else:
+            distance = table[next_cell]
+            table[y * maze.width + x] = distance + 1 if distance > 0 else distance - 1
+
+    def jump(self, cell, direction, goal):
+        """Same result as the module level jump(), read from the table in O(1)"""
+        width = self.maze.width
+        dx, dy = direction
+        distance = self.jumps[DIRECTION_INDEX[direction]][cell]
+        span = distance if distance > 0 else -distance
+        y, x = divmod(cell, width)
+        goal_y, goal_x = divmod(goal, width)
+
+        if dx:
+            if goal_y == y and 0 < (goal_x - x) * dx <= span:
+                return goal
+        elif goal_x == x and 0 < (goal_y - y) * dy <= span:
+            return goal
+        elif 0 < (goal_y - y) * dy < span or (distance <= 0 and 0 < (goal_y - y) * dy <= span):
+            # Crossing the goal's row before the jump point: stop if the goal is in plain view
+            row_cell = goal_y * width + x
+            toward = EAST if goal_x > x else WEST
+            clear = self.jumps[toward][row_cell]
+            if clear <= 0 and abs(goal_x - x) <= -clear:
+                return row_cell
+
+        if distance > 0:
+            return cell + distance * (dx + dy * width)
+        return -1
@@ -0,0 +1,144 @@
+"""Load generator for server.py: fires find_path requests and reports latency and throughput.
+
+Each connection keeps up to --in-flight requests pipelined. Starts are drawn
+at random; --targets limits how many distinct targets the requests share,
+which is what lets the server coalesce them (many ghosts, one Pac-Man).
+Answers are reported per algorithm_used, so batches a server started with
+--share answered from a distance field are not mixed with real searches.
+
+    python server.py pacman_map.csv --port 8765 --share &
+    python load_generator.py pacman_map.csv --port 8765 --requests 20000 --connections 8 --targets 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+from time import perf_counter
+
+from maze import Maze, load_maze_layout
+from benchmark import random_pairs, percentile
+
+COUNTERS = ["requests", "answered", "errors", "batches", "offloaded", "searches", "coalesced"]
+
+
+async def connect(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def call(host, port, unix_path, request):
+    """Send one request on its own connection and return the response"""
+    reader, writer = await connect(host, port, unix_path)
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    return response
+
+
+async def run_connection(host, port, unix_path, requests, in_flight, latencies, errors):
+    reader, writer = await connect(host, port, unix_path)
+    sent = {}  # id -> send time
+    slots = asyncio.Semaphore(in_flight)
+
+    async def receive():
+        for _ in range(len(requests)):
+            response = json.loads(await reader.readline())
+            latency = perf_counter() - sent.pop(response["id"])
+            if "error" in response:
+                errors.append(response["error"])
+            else:
+                latencies.setdefault(response["algorithm_used"], []).append(latency)
+            slots.release()
+
+    receiver = asyncio.ensure_future(receive())
+    for request in requests:
+        await slots.acquire()
+        sent[request["id"]] = perf_counter()
+        writer.write(json.dumps(request, separators=(",", ":")).encode() + b"\n")
+        await writer.drain()
+    await receiver
+    writer.close()
+
+
+def make_requests(maze_path, algorithm, count, targets, seed):
+    rng = random.Random(seed)
+    maze = Maze(load_maze_layout(maze_path))
+    pairs = random_pairs(maze, count, rng)
+    target_pool = [target for _, target in pairs[:targets]] if targets else None
+    return [{"id": i, "op": "find_path", "maze": maze_path, "algorithm": algorithm, "start": list(start),
+             "target": list(rng.choice(target_pool) if target_pool else target)}
+            for i, (start, target) in enumerate(pairs)]
+
+
+async def run_load(host, port, unix_path, requests, connections, in_flight):
+    """Returns ({algorithm_used: client-side latencies in seconds}, error messages, seconds taken,
+    server counters during the run)"""
+    latencies, errors = {}, []
+    before = await call(host, port, unix_path, {"id": "stats", "op": "stats"})
+    started = perf_counter()
+    await asyncio.gather(*(run_connection(host, port, unix_path, requests[i::connections], in_flight,
+                                          latencies, errors)
+                           for i in range(connections)))
+    elapsed = perf_counter() - started
+    after = await call(host, port, unix_path, {"id": "stats", "op": "stats"})
+    # The server counts since it started; only this run's share is of interest
+    stats = {name: after[name] - before[name] for name in COUNTERS}
+    return latencies, errors, elapsed, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a running server.py")
+    parser.add_argument("maze", help="a map the server was started with, named as it was given there")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--algorithm", default="bfs")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--in-flight", type=int, default=32, help="pipelined requests per connection")
+    parser.add_argument("--targets", type=int, default=0, help="distinct targets to share (0 = a random one each)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to a .json file")
+    args = parser.parse_args(argv)
+
+    requests = make_requests(args.maze, args.algorithm, args.requests, args.targets, args.seed)
+    latencies, errors, elapsed, stats = asyncio.run(
+        run_load(args.host, args.port, args.unix, requests, args.connections, args.in_flight))
+    answered = sum(len(values) for values in latencies.values())
+
+    def latency_stats(values):
+        values = sorted(latency * 1000 for latency in values)
+        return {f"latency_ms_p{p}": round(percentile(values, p), 3) for p in (50, 95, 99)}
+
+    results = {
+        "requests": len(requests),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "throughput": round(answered / elapsed, 3),
+        **latency_stats([latency for values in latencies.values() for latency in values]),
+        # A server started with --share answers from a distance field; keep that apart from the real searches
+        "algorithm_used": {algorithm: {"answered": len(values), **latency_stats(values)}
+                           for algorithm, values in sorted(latencies.items())},
+        "server": stats,
+    }
+    print(f"{results['requests']} requests in {results['seconds']} s: {results['throughput']:.0f} req/s  "
+          f"latency p50/p95/p99={results['latency_ms_p50']:.2f}/{results['latency_ms_p95']:.2f}/"
+          f"{results['latency_ms_p99']:.2f} ms  errors={results['errors']}")
+    for algorithm, used in results["algorithm_used"].items():
+        print(f"  answered by {algorithm}: {used['answered']}  latency p50/p95/p99={used['latency_ms_p50']:.2f}/"
+              f"{used['latency_ms_p95']:.2f}/{used['latency_ms_p99']:.2f} ms")
+    print(f"server: {stats['searches']} searches in {stats['batches']} batches "
+          f"({stats['offloaded']} offloaded), {stats['coalesced']} requests coalesced")
+    for error in errors[:5]:
+        print("error:", error, file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,312 +1,94 @@
+import argparse
 import pygame
-import time
-from timeit import default_timer as timer
-
-import heapq
-import math
 import sys
-import os
-import tracemalloc
-from collections import deque
-import csv
-import random
-
-map_path ='pacman_map1.csv'
-
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-BLUE = (0, 0, 255)
-PINK = (255, 192, 203)
-ORANGE = (255, 165, 0)
-RED = (255, 0, 0)
-YELLOW = (255, 255, 0)
-GREEN = (0, 255, 0)
-GRAY = (128, 128, 128)
-
-# Constants
-CELL_SIZE = 30
-WALL = 1
-PATH = 0
-
-class Maze:
-    def __init__(self, layout):
-        self.layout = layout
-        self.height = len(layout)
-        self.width = len(layout[0])
-
-    def is_valid_position(self, position):
-        x, y = position
-        return (0 <= x < self.width and 
-                0 <= y < self.height and 
-                self.layout[y][x] == PATH)
-
-    def get_neighbors(self, position):
-        x, y = position
-        neighbors = []
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-            next_x, next_y = x + dx, y + dy
-            if self.is_valid_position((next_x, next_y)):
-                neighbors.append((next_x, next_y))
-        # Get neighbors in a random order
-        random.shuffle(neighbors)
-        return neighbors
-
-
-class Character:
-    def __init__(self, position):
-        self.position = position
-        self.previous_position = position
-
-
-class PacMan(Character):
-    def __init__(self, position):
-        super().__init__(position)
-
-    def move(self, direction, maze):
-        dx, dy = direction
-        new_position = (self.position[0] + dx, self.position[1] + dy)
-        if maze.is_valid_position(new_position):
-            self.previous_position = self.position
-            self.position = new_position
-            return True
-        return False
-
-
-class Ghost(Character):
-    def __init__(self, position, color, name):
-        super().__init__(position)
-        self.color = color
-        self.name = name
-        self.path = []
-        self.metrics = {
-            "search_time": 0,
-            "memory_usage": 0,
-            "nodes_expanded": 0
-        }
-        self.last_target_position = None  # Track the last target position
-    def find_path(self, maze, target_position):
-        # 4 ghost classes will implement this method
-        # This is a placeholder for the actual pathfinding algorithm
-        pass
-
-    def move(self, maze):
-        if self.path:
-            next_position = self.path.pop(0)
-            if maze.is_valid_position(next_position):
-                self.previous_position = self.position
-                self.position = next_position
-                return True
-        return False
-
-    def update_path(self, maze, target_position):
-        if target_position != self.last_target_position:
-            self.last_target_position = target_position
-            self.find_path(maze, target_position)
-
-
-class BlueGhost(Ghost):
-    def __init__(self, position):
-        super().__init__(position, BLUE, "Blue (BFS)")
-
-    def find_path(self, maze, target_position):
-
-        start_time = timer()
-        tracemalloc.start()  # Start memory tracking
-
-        # BFS implementation
-        queue = deque([(self.position, [])])  # (position, path)
-        visited = {self.position}
-        nodes_expanded = 0
-
-        while queue:
-            current_pos, path = queue.popleft()
-            nodes_expanded += 1
-
-            if current_pos == target_position:
-                self.path = path
-                break
-
-            for next_pos in maze.get_neighbors(current_pos):
-                if next_pos not in visited:
-                    visited.add(next_pos)
-                    queue.append((next_pos, path + [next_pos]))
-
-        search_time = timer() - start_time
-        current, peak = tracemalloc.get_traced_memory()  # Get memory usage
-        tracemalloc.stop()  # Stop memory tracking
-
-        self.metrics = {
-            "search_time": search_time,
-            "memory_usage": peak / 1024,  # Convert to KB
-            "nodes_expanded": nodes_expanded
-        }
-        return self.metrics
-
-
-class PinkGhost(Ghost):
-    def __init__(self, position):
-        super().__init__(position, PINK, "Pink (DFS)")
-
-    def find_path(self, maze, target_position):
-        start_time = timer()
-        tracemalloc.start()  # Start memory tracking
-
-        # DFS implementation
-        stack = [(self.position, [])]  # (position, path)
-        visited = {self.position}
-        nodes_expanded = 0
-
-        while stack:
-            current_pos, path = stack.pop()
-            nodes_expanded += 1
-
-            if current_pos == target_position:
-                self.path = path
-                break
-
-            for next_pos in reversed(maze.get_neighbors(current_pos)):  # reversed để thứ tự gần giống BFS
-                if next_pos not in visited:
-                    visited.add(next_pos)
-                    stack.append((next_pos, path + [next_pos]))
-
-        search_time = timer() - start_time
-        current, peak = tracemalloc.get_traced_memory()  # Get memory usage
-        tracemalloc.stop()  # Stop memory tracking
-
-        self.metrics = {
-            "search_time": search_time,
-            "memory_usage": peak / 1024,  # Convert to KB
-            "nodes_expanded": nodes_expanded
-        }
-        return self.metrics
-
-
-
-class OrangeGhost(Ghost):
-    def __init__(self, position):
-        super().__init__(position, ORANGE, "Orange (UCS)")
-
-    def find_path(self, maze, target_position):
-        start_time = timer()
-        tracemalloc.start()  # Start memory tracking
-
-        # UCS implementation
-        frontier = []
-        heapq.heappush(frontier, (0, self.position, []))  # (cost, position, path)
-        visited = set()
-        nodes_expanded = 0
-
-        while frontier:
-            cost, current_pos, path = heapq.heappop(frontier)
-            nodes_expanded += 1
-
-            if current_pos == target_position:
-                self.path = path
-                break
-
-            if current_pos in visited:
-                continue
-            visited.add(current_pos)
-
-            for neighbor in maze.get_neighbors(current_pos):
-                if neighbor not in visited:
-                    new_cost = cost + 1
-                    heapq.heappush(frontier, (new_cost, neighbor, path + [neighbor]))
-
-        search_time = timer() - start_time
-        current, peak = tracemalloc.get_traced_memory()  # Get memory usage
-        tracemalloc.stop()  # Stop memory tracking
-
-        self.metrics = {
-            "search_time": search_time,
-            "memory_usage": peak / 1024,  # Convert to KB
-            "nodes_expanded": nodes_expanded
-        }
-        return self.metrics
-
-
-class RedGhost(Ghost):
-    def __init__(self, position):
-        super().__init__(position, RED, "Red (A*)")
-
-    def heuristic(self, a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    def find_path(self, maze, target_position):
-        start_time = time.time()
-        tracemalloc.start()  # Start memory tracking
-
-        open_list = []
-        heapq.heappush(open_list, (0, self.position, []))
-        came_from = {}
-        g_score = {self.position: 0}
-        f_score = {self.position: self.heuristic(self.position, target_position)}
-        visited = set()
-        nodes_expanded = 0
-
-        while open_list:
-            _, current_pos, path = heapq.heappop(open_list)
-            nodes_expanded += 1
-
-            if current_pos in visited:
-                continue
-
-            visited.add(current_pos)
-
-            if current_pos == target_position:
-                self.path = path
-                break
-
-            for neighbor in maze.get_neighbors(current_pos):
-                tentative_g_score = g_score[current_pos] + 1
-
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current_pos
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + self.heuristic(neighbor, target_position)
-                    heapq.heappush(open_list, (f_score[neighbor], neighbor, path + [neighbor]))
-
-        search_time = time.time() - start_time
-        current, peak = tracemalloc.get_traced_memory()  # Get memory usage
-        tracemalloc.stop()  # Stop memory tracking
-
-        self.metrics = {
-            "search_time": search_time,
-            "memory_usage": peak / 1024,  # Convert to KB
-            "nodes_expanded": nodes_expanded
-        }
-        return self.metrics
-
-
-class Game:
-    def __init__(self, maze_layout, user_controlled=True):
-        self.maze = Maze(maze_layout)
+from collections import OrderedDict
+
+from constants import BLACK, WHITE, BLUE, YELLOW, GREEN, GRAY, CYAN, CELL_SIZE, WALL
+from maze import create_maze_layout
+from ghosts import Ghost, RedGhost
+from simulation import Simulation, LEVELS, INCREMENTAL_LEVEL, SWARM_LEVEL
+from replay import SessionRecorder, AUTOPILOT, LEVEL, RESET, TOGGLE
+from swarm import parse_roster
+
+
+LEVEL_NAMES = {
+    1: "Blue Ghost (BFS)",
+    2: "Pink Ghost (DFS)",
+    3: "Orange Ghost (UCS)",
+    4: "Red Ghost (A*)",
+    5: "All Ghosts (Parallel)",
+    6: "User Control",
+    7: "Purple Ghost (Incremental A*)",
+    8: "Swarm (Shared distance field)",
+}
+
+
+def format_memory(memory_usage, precision):
+    # memory_usage is None when the instrumentation mode does not trace memory
+    return "-" if memory_usage is None else f"{memory_usage:.{precision}f}"
+
+
+class TextCache:
+    """Rendered text surfaces keyed on (font, text, color), least recently used evicted first.
+
+    HUD strings only change when a ghost replans or moves, so most frames
+    blit cached surfaces instead of rasterizing the same text again.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class Game(Simulation):
+    def __init__(self, maze_layout, user_controlled=True, planner_mode="thread", swarm_size=64, neighbor_seed=None,
+                 record_path=None, profile_path=None, corridors=False, autopilot=False, autopilot_budget=0.01,
+                 swarm_roster=None):
+        # Levels 5/6 plan on a worker pool so searches never stall a frame
+        super().__init__(maze_layout, user_controlled, planner_mode=planner_mode, swarm_size=swarm_size,
+                         neighbor_seed=neighbor_seed, corridors=corridors, autopilot=autopilot,
+                         autopilot_budget=autopilot_budget, swarm_roster=swarm_roster)
         self.screen_width = self.maze.width * CELL_SIZE
         self.screen_height = self.maze.height * CELL_SIZE + 100  # Extra space for metrics
-        self.pacman = PacMan((1, self.maze.height - 2))
-        self.ghosts = [
-            BlueGhost((self.maze.width - 2, 4)),
-            PinkGhost((self.maze.width - 2, 3)),
-            OrangeGhost((self.maze.width - 2, 2)),
-            RedGhost((self.maze.width - 2, 1))
-        ]
-        self.user_controlled = user_controlled
-        self.ghost_move = False
         self.clock = pygame.time.Clock()
         self.running = True
-        self.game_over = False
         self.font = None
         self.big_font = None
         self.title_font = None
-        self.level = 1
-        self.parallel_execution = False
-        self.pacman_move_counter = 0
-        self.ghost_move_counter = 0
-        self.pacman_speed = 5  # Pac-Man moves every 10 frame
-        self.ghost_speed = 10  # Ghosts move every 30 frames
+        self.text_cache = TextCache()
+        # Keyboard input is the only thing a seeded session does not determine, so it is logged
+        self.recorder = SessionRecorder(record_path, self) if record_path else None
+        # P shows the frame profile, E (and quitting, with profile_path) exports it
+        self.profile_path = profile_path or "profile.json"
+        self.export_profile = profile_path is not None
+        self.profiler.enabled = self.export_profile
+        self.show_profile = False
+        self.profile_lines = []  # (depth, text, histogram), refreshed every profile_refresh frames
+        self.profile_refresh = 15
+        # Searches from scratch wherever Purple searches incrementally, for the level 7 HUD only
+        self.replan_baseline = RedGhost(self.purple.position)
         self.init_pygame()
 
+    def record(self, action, value=None):
+        if self.recorder:
+            self.recorder.record(self.tick, action, value)
+
     def init_pygame(self):
         pygame.init()
         pygame.display.set_caption("Pac-Man Search Algorithms")
@@ -314,244 +96,241 @@ class Game:
         self.font = pygame.font.SysFont("Arial", 10)
         self.big_font = pygame.font.SysFont("Arial", 20)
         self.title_font = pygame.font.SysFont("Arial", 36)
+        self.maze_surface = self.build_maze_surface()
+        self.overlay = pygame.Surface((self.screen_width, self.screen_height))
+        self.overlay.set_alpha(180)
+        self.overlay.fill(BLACK)
+        self.hud_rect = pygame.Rect(0, self.maze.height * CELL_SIZE, self.screen_width, self.screen_height - self.maze.height * CELL_SIZE)
+        self.drawn_cells = {}
+        self.full_redraw = True
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.full_redraw = True
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
                 elif event.key == pygame.K_r:
+                    self.record(RESET)
                     self.reset_game()
-                elif event.key == pygame.K_1:
-                    self.level = 1
-                    self.parallel_execution = False
-                    self.user_controlled = True
-                    self.ghost_move = False
-                    self.reset_game()
-                elif event.key == pygame.K_2:
-                    self.level = 2
-                    self.parallel_execution = False
-                    self.user_controlled = True
-                    self.ghost_move = False
-                    self.reset_game()
-                elif event.key == pygame.K_3:
-                    self.level = 3
-                    self.parallel_execution = False
-                    self.user_controlled = True
-                    self.ghost_move = False
-                    self.reset_game()
-                elif event.key == pygame.K_4:
-                    self.level = 4
-                    self.parallel_execution = False
-                    self.user_controlled = True
-                    self.ghost_move = False
-                    self.reset_game()
-                elif event.key == pygame.K_5:
-                    self.level = 5
-                    self.parallel_execution = True
-                    self.user_controlled = True
-                    self.ghost_move = False
-                    self.reset_game()
-                elif event.key == pygame.K_6:
-                    self.level = 6
-                    self.parallel_execution = True
-                    self.user_controlled = False
-                    self.ghost_move = False
-                    self.reset_game()
+                elif pygame.K_1 <= event.key <= pygame.K_0 + max(LEVELS):
+                    self.record(LEVEL, event.key - pygame.K_0)
+                    self.set_level(event.key - pygame.K_0)
+                elif event.key == pygame.K_m:
+                    Ghost.instrumentation.next_mode()
+                elif event.key == pygame.K_p:
+                    self.show_profile = not self.show_profile
+                    self.profiler.enabled = self.show_profile or self.export_profile
+                    self.profile_lines = []
+                    self.full_redraw = True  # paint over (or restore) the panel's area
+                elif event.key == pygame.K_e:
+                    self.profiler.export(self.profile_path)
                 elif event.key == pygame.K_RETURN:
-                    self.user_controlled = not self.user_controlled
-                    self.ghost_move = not self.ghost_move
+                    self.record(TOGGLE)
+                    self.toggle_running()
+                elif event.key == pygame.K_a:
+                    self.toggle_autopilot()
+                    self.record(AUTOPILOT, self.autopilot is not None)
 
 
     def update(self):
-        if self.game_over:
-            return
- 
-        # Increment movement counters
-        self.pacman_move_counter += 1
-        self.ghost_move_counter += 1
-
-        # Check if any ghost caught Pac-Man
-        for ghost in self.ghosts:
-            if ghost.position == self.pacman.position:
-                self.game_over = True
-                return
-
-        # Move Pac-Man every frame
-        if self.pacman_move_counter >= self.pacman_speed:
-            self.pacman_move_counter = 0
-            # User control for PacMan
-            if self.user_controlled and not self.game_over:
-                keys = pygame.key.get_pressed()
-                move_made = False
-                
-                if keys[pygame.K_UP]:
-                    move_made = self.pacman.move((0, -1), self.maze)
-                elif keys[pygame.K_DOWN]:
-                    move_made = self.pacman.move((0, 1), self.maze)
-                elif keys[pygame.K_LEFT]:
-                    move_made = self.pacman.move((-1, 0), self.maze)
-                elif keys[pygame.K_RIGHT]:
-                    move_made = self.pacman.move((1, 0), self.maze)
-                
-            if self.user_controlled:
-                for ghost in self.ghosts:
-                    ghost.update_path(self.maze, self.pacman.position)
-
-
-
-
-        # Move ghosts 
-        if self.ghost_move_counter >= self.ghost_speed and self.ghost_move:
-            self.ghost_move_counter = 0          
-
-            if self.level == 1:
-                active_ghost = self.ghosts[0]  # Blue Ghost
-                active_ghost.update_path(self.maze, self.pacman.position)
-                active_ghost.move(self.maze)
-            elif self.level == 2:
-                active_ghost = self.ghosts[1]  # Pink Ghost
-                active_ghost.update_path(self.maze, self.pacman.position)
-                active_ghost.move(self.maze)
-            elif self.level == 3:
-                active_ghost = self.ghosts[2]  # Orange Ghost
-                active_ghost.update_path(self.maze, self.pacman.position)
-                active_ghost.move(self.maze)
-            elif self.level == 4:
-                active_ghost = self.ghosts[3]  # Red Ghost
-                active_ghost.update_path(self.maze, self.pacman.position)
-                active_ghost.move(self.maze)
-            elif self.level >= 5:  # Parallel execution for levels 5 and 6
-                # Update paths for all ghosts if not user-controlled
-                for ghost in self.ghosts:
-                    ghost.update_path(self.maze, self.pacman.position)
-
-                # Move all ghosts
-                for i, ghost in enumerate(self.ghosts):
-                    old_position = ghost.position
-                    ghost.move(self.maze)
-
-                    # Check for collisions with other ghosts
-                    for j, other_ghost in enumerate(self.ghosts):
-                        if i != j and ghost.position == other_ghost.position:
-                            ghost.position = ghost.previous_position  # Revert move if collision
-                            ghost.path.insert(0,ghost.previous_position)  # Add old position back to path
-    def draw_maze(self):
-        self.screen.fill(BLACK)
-        
-        # Draw maze
+        keys = pygame.key.get_pressed()
+        direction = None
+        if keys[pygame.K_UP]:
+            direction = (0, -1)
+        elif keys[pygame.K_DOWN]:
+            direction = (0, 1)
+        elif keys[pygame.K_LEFT]:
+            direction = (-1, 0)
+        elif keys[pygame.K_RIGHT]:
+            direction = (1, 0)
+        tick = self.tick
+        incremental = self.purple if self.level == INCREMENTAL_LEVEL else None
+        if incremental is not None:
+            searched_from, last_search = incremental.position, incremental.metrics  # it plans before it moves
+        super().update(direction)
+        if incremental is not None and incremental.metrics is not last_search:
+            self.replan_baseline.position = searched_from
+            with self.profiler.phase("Red replan"):
+                self.replan_baseline.find_path(self.maze, incremental.last_target_position)
+        if self.recorder:
+            # The autopilot's moves depend on how deep it got in time, so they are logged as the input
+            self.recorder.record_direction(tick, self.autopilot_direction if self.autopilot else direction)
+
+    def build_maze_surface(self):
+        # The walls never change, so they are drawn once and blitted from here
+        surface = pygame.Surface((self.maze.width * CELL_SIZE, self.maze.height * CELL_SIZE)).convert()
+        surface.fill(BLACK)
         for y in range(self.maze.height):
             for x in range(self.maze.width):
                 rect = pygame.Rect(x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
                 if self.maze.layout[y][x] == WALL:
-                    pygame.draw.rect(self.screen, BLUE, rect)
+                    pygame.draw.rect(surface, BLUE, rect)
                 else:
-                    pygame.draw.rect(self.screen, BLACK, rect)
+                    pygame.draw.rect(surface, BLACK, rect)
                     # Draw grid lines
-                    pygame.draw.rect(self.screen, GRAY, rect, 1)
-
-    def draw_characters(self):
-        # Draw PacMan
-        center_x = self.pacman.position[0] * CELL_SIZE + CELL_SIZE // 2
-        center_y = self.pacman.position[1] * CELL_SIZE + CELL_SIZE // 2
-        radius = CELL_SIZE // 2 - 2
-        pygame.draw.circle(self.screen, YELLOW, (center_x, center_y), radius)
-        
-        # Draw active ghosts based on level
-        if self.level == 1:
-            self.draw_ghost(self.ghosts[0])
-        elif self.level == 2:
-            self.draw_ghost(self.ghosts[1])
-        elif self.level == 3:
-            self.draw_ghost(self.ghosts[2])
-        elif self.level == 4:
-            self.draw_ghost(self.ghosts[3])
-        elif self.level >= 5:  # All ghosts for levels 5 and 6
-            for ghost in self.ghosts:
-                self.draw_ghost(ghost)
-
-    def draw_ghost(self, ghost):
-        x = ghost.position[0] * CELL_SIZE + CELL_SIZE // 4
-        y = ghost.position[1] * CELL_SIZE + CELL_SIZE // 4
-        width = CELL_SIZE // 2
-        height = CELL_SIZE // 2
-        pygame.draw.rect(self.screen, ghost.color, (x, y, width, height))
-        
-        # Draw path for debugging
-        if ghost.path:
+                    pygame.draw.rect(surface, GRAY, rect, 1)
+        return surface
+
+    def cell_rect(self, cell):
+        return pygame.Rect(cell[0] * CELL_SIZE, cell[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+    def draw_maze(self, dirty_cells, full):
+        if full:
+            self.screen.fill(BLACK)
+            self.screen.blit(self.maze_surface, (0, 0))
+        else:
+            for cell in dirty_cells:
+                rect = self.cell_rect(cell)
+                self.screen.blit(self.maze_surface, rect, rect)
+
+    def sprite_cells(self):
+        """What each occupied cell shows this frame, as {cell: [items in draw order]}.
+
+        Every item fits inside its own cell, so comparing this with the previous
+        frame gives exactly the cells that need repainting.
+        """
+        cells = {self.pacman.position: [("pacman", YELLOW)]}
+        for ghost in self.active_ghosts():
+            cells.setdefault(ghost.position, []).append(("ghost", ghost.color))
+            # Draw path for debugging
             for pos in ghost.path:
-                center_x = pos[0] * CELL_SIZE + CELL_SIZE // 2
-                center_y = pos[1] * CELL_SIZE + CELL_SIZE // 2
-                pygame.draw.circle(self.screen, ghost.color, (center_x, center_y), 3)
+                cells.setdefault(pos, []).append(("dot", ghost.color))
+        return cells
+
+    def draw_characters(self, cells, dirty_cells):
+        for cell in dirty_cells:
+            for kind, color in cells.get(cell, ()):
+                center_x = cell[0] * CELL_SIZE + CELL_SIZE // 2
+                center_y = cell[1] * CELL_SIZE + CELL_SIZE // 2
+                if kind == "pacman":
+                    pygame.draw.circle(self.screen, color, (center_x, center_y), CELL_SIZE // 2 - 2)
+                elif kind == "ghost":
+                    x = cell[0] * CELL_SIZE + CELL_SIZE // 4
+                    y = cell[1] * CELL_SIZE + CELL_SIZE // 4
+                    pygame.draw.rect(self.screen, color, (x, y, CELL_SIZE // 2, CELL_SIZE // 2))
+                else:
+                    pygame.draw.circle(self.screen, color, (center_x, center_y), 3)
 
     def draw_metrics(self):
         y_offset = self.maze.height * CELL_SIZE + 10
+        self.screen.fill(BLACK, self.hud_rect)
         
         # Draw level info
-        level_text = f"Level {self.level}: "
-        if self.level == 1:
-            level_text += "Blue Ghost (BFS)"
-            active_ghost = self.ghosts[0]
-        elif self.level == 2:
-            level_text += "Pink Ghost (DFS)"
-            active_ghost = self.ghosts[1]
-        elif self.level == 3:
-            level_text += "Orange Ghost (UCS)"
-            active_ghost = self.ghosts[2]
-        elif self.level == 4:
-            level_text += "Red Ghost (A*)"
-            active_ghost = self.ghosts[3]
-        elif self.level == 5:
-            level_text += "All Ghosts (Parallel)"
-            active_ghost = None
-        elif self.level == 6:
-            level_text += "User Control"
-            active_ghost = None
-        
-        level_surface = self.big_font.render(level_text, True, WHITE)
+        level_text = f"Level {self.level}: {LEVEL_NAMES[self.level]}"
+        level_surface = self.text_cache.render(self.big_font, level_text, WHITE)
         self.screen.blit(level_surface, (10, y_offset))
+        if self.autopilot:
+            metrics = self.autopilot.metrics
+            hit_rate = metrics["tt_hits"] / metrics["tt_probes"] if metrics["tt_probes"] else 0
+            autopilot_text = (
+                f"Autopilot ({self.autopilot.model}): Depth: {metrics['depth']} | Nodes: {metrics['nodes']} | "
+                f"TT hits: {hit_rate:.0%} | Time: {metrics['search_time']:.4f} sec"
+            )
+            autopilot_surface = self.text_cache.render(self.font, autopilot_text, YELLOW)
+            self.screen.blit(autopilot_surface, (20 + level_surface.get_width(), y_offset + 8))
         
         # Draw metrics for appropriate ghost(s)
-        if self.level <= 4:
+        active_ghost = self.solo_ghost()
+        if active_ghost is not None:
+            nodes = f"{active_ghost.metrics['nodes_expanded']}"
+            if "cells_covered" in active_ghost.metrics:  # contracted graph: also show the per-cell equivalent
+                nodes += f" ({active_ghost.metrics['cells_covered']} cells)"
             metrics_text = (
                 f"Search Time: {active_ghost.metrics['search_time']:.7f} sec | "
-                f"Memory: {active_ghost.metrics['memory_usage']:.6f} KB | "
-                f"Nodes: {active_ghost.metrics['nodes_expanded']}"
+                f"Memory: {format_memory(active_ghost.metrics['memory_usage'], 6)} KB | "
+                f"Nodes: {nodes} | "
+                f"Repaired: {active_ghost.repair_hits}/{active_ghost.repair_hits + active_ghost.repair_misses}"
+            )
+            metrics_surface = self.text_cache.render(self.font, metrics_text, WHITE)
+            self.screen.blit(metrics_surface, (10, y_offset + 30))
+            if self.level == INCREMENTAL_LEVEL:
+                baseline = self.replan_baseline
+                baseline_text = (
+                    f"{baseline.name} replanning from scratch: Search Time: {baseline.metrics['search_time']:.7f} sec | "
+                    f"Memory: {format_memory(baseline.metrics['memory_usage'], 6)} KB | "
+                    f"Nodes: {baseline.metrics['nodes_expanded']}"
+                )
+                baseline_surface = self.text_cache.render(self.font, baseline_text, baseline.color)
+                self.screen.blit(baseline_surface, (10, y_offset + 45))
+        elif self.level == SWARM_LEVEL:
+            metrics = self.swarm_planner.metrics
+            fields = self.swarm_planner.distance_fields
+            metrics_text = (
+                f"{len(self.swarm)} ghosts: Step: {metrics['search_time']:.7f} sec | "
+                f"Memory: {format_memory(metrics['memory_usage'], 2)} KB | "
+                f"Nodes: {metrics['nodes_expanded']} | Waiting: {metrics['waiting']} | "
+                f"Fields: {fields.hits} hits, {fields.misses} misses"
             )
-            metrics_surface = self.font.render(metrics_text, True, WHITE)
+            metrics_surface = self.text_cache.render(self.font, metrics_text, WHITE)
             self.screen.blit(metrics_surface, (10, y_offset + 30))
-        elif self.level >= 5:
-            for i, ghost in enumerate(self.ghosts):
+        else:
+            for i, ghost in enumerate(self.pack):
                 metrics_text = (
                     f"{ghost.name}: Time: {ghost.metrics['search_time']:.7f} sec | "
-                    f"Memory: {ghost.metrics['memory_usage']:.2f} KB | "
+                    f"Memory: {format_memory(ghost.metrics['memory_usage'], 2)} KB | "
                     f"Nodes: {ghost.metrics['nodes_expanded']}"
                     f"Position: {ghost.position}"
                 )
-                metrics_surface = self.font.render(metrics_text, True, ghost.color)
+                metrics_surface = self.text_cache.render(self.font, metrics_text, ghost.color)
                 self.screen.blit(metrics_surface, (10, y_offset + 30 + i * 15))
 
         # Draw controls info
-        controls_text = "Controls: 1-6 - Change Level | Enter - Start/Pause | R - Reset | ESC - Quit | Arrow Keys - Move Pac-Man (Level 6)"
-        controls_surface = self.font.render(controls_text, True, GREEN)
+        controls_text = (
+            f"Controls: 1-{max(LEVELS)} - Change Level | Enter - Start/Pause | R - Reset | ESC - Quit | Arrow Keys - Move Pac-Man (Level 6) | "
+            f"M - Metrics mode ({Ghost.instrumentation.mode}) | P - Profile | E - Export profile | A - Autopilot"
+        )
+        controls_surface = self.text_cache.render(self.font, controls_text, GREEN)
         self.screen.blit(controls_surface, (10, y_offset-10))
 
+    def profile_rect(self):
+        # Top-left panel, one line per phase
+        height = 8 + 12 * max(1, len(self.profile_lines))
+        return pygame.Rect(0, 0, min(self.screen_width, 330), min(self.maze.height * CELL_SIZE, height))
+
+    def profile_cells(self):
+        # Maze cells under the panel, repainted every frame while it is shown
+        rect = self.profile_rect()
+        return [(x, y) for y in range(rect.top // CELL_SIZE, -(-rect.bottom // CELL_SIZE))
+                for x in range(rect.left // CELL_SIZE, -(-rect.right // CELL_SIZE))]
+
+    def draw_profile(self):
+        if self.profiler.frames % self.profile_refresh == 0 or not self.profile_lines:
+            self.profile_lines = [
+                (phase["depth"], name,
+                 f"p50 {phase['p50_ms']:.2f}  p95 {phase['p95_ms']:.2f}  max {phase['max_ms']:.2f} ms",
+                 phase["histogram"])
+                for name, phase in self.profiler.summary().items()
+            ]
+        rect = self.profile_rect()
+        self.screen.fill(BLACK, rect)
+        for i, (depth, name, timings, histogram) in enumerate(self.profile_lines):
+            y = rect.top + 4 + i * 12
+            self.screen.blit(self.text_cache.render(self.font, name, WHITE), (rect.left + 4 + depth * 8, y))
+            self.screen.blit(self.text_cache.render(self.font, timings, WHITE), (rect.left + 130, y))
+            # Histogram of the window: one bar per bucket, 0.25 ms up to over 33 ms
+            peak = max(histogram) or 1
+            for bucket, count in enumerate(histogram):
+                bar = 10 * count // peak
+                if bar:
+                    pygame.draw.rect(self.screen, CYAN, (rect.right - 4 - (len(histogram) - bucket) * 4, y + 10 - bar, 3, bar))
+        return rect
+
     def draw_game_over(self):
         if self.game_over:
-            overlay = pygame.Surface((self.screen_width, self.screen_height))
-            overlay.set_alpha(180)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.overlay, (0, 0))
             
-            for i, ghost in enumerate(self.ghosts):
+            ghosts = self.ghosts + [self.purple] if self.level == INCREMENTAL_LEVEL else self.ghosts
+            for i, ghost in enumerate(ghosts):
                 metrics_text = (
                     f"{ghost.name}: Time: {ghost.metrics['search_time']:.6f} sec | "
-                    f"Memory: {ghost.metrics['memory_usage']:.2f} KB | "
+                    f"Memory: {format_memory(ghost.metrics['memory_usage'], 2)} KB | "
                     f"Nodes: {ghost.metrics['nodes_expanded']}"
                 )
-                metrics_surface = self.big_font.render(metrics_text, True, ghost.color)
+                metrics_surface = self.text_cache.render(self.big_font, metrics_text, ghost.color)
                 metrics_rec = metrics_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 40))
                 self.screen.blit(metrics_surface, (metrics_rec.x, metrics_rec.y + i * 20))
                 
@@ -559,64 +338,102 @@ class Game:
             #text_rect = result_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 20))
             #self.screen.blit(result_text, text_rect)
             
-            restart_text = self.big_font.render("Press R to Restart", True, WHITE)
+            restart_text = self.text_cache.render(self.big_font, "Press R to Restart", WHITE)
             restart_rect = restart_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2 + 40))
             self.screen.blit(restart_text, restart_rect)
 
     def draw(self):
-        self.draw_maze()
-        self.draw_characters()
-        self.draw_metrics()
-        self.draw_game_over()
-        pygame.display.flip()
-
-    def reset_game(self):
-        self.pacman.position = (1, self.maze.height - 2)
-        self.ghosts[0].position = (self.maze.width - 2, 4)  # Blue
-        self.ghosts[1].position = (self.maze.width - 2, 3)  # Pink
-        self.ghosts[2].position = (self.maze.width - 2, 2)  # Orange
-        self.ghosts[3].position = (self.maze.width - 2, 1)  # Red
-        for ghost in self.ghosts:
-            ghost.last_target_position = None  # Reset last target position
-        
-        for ghost in self.ghosts:
-            ghost.path = []
-        
-        self.game_over = False
+        profiler = self.profiler
+        with profiler.phase("sprite_cells"):
+            cells = self.sprite_cells()
+            # The game over overlay darkens the whole screen, so it (and the frame
+            # after it goes away) repaints everything; other frames only touch
+            # cells whose contents changed, plus the metrics panel
+            full = self.full_redraw or self.game_over
+            if full:
+                dirty_cells = list(cells)
+            else:
+                dirty_cells = [cell for cell in cells.keys() | self.drawn_cells.keys()
+                               if cells.get(cell) != self.drawn_cells.get(cell)]
+                if self.show_profile:
+                    dirty_cells = list(set(dirty_cells).union(self.profile_cells()))
+
+        with profiler.phase("draw_maze"):
+            self.draw_maze(dirty_cells, full)
+        with profiler.phase("draw_characters"):
+            self.draw_characters(cells, dirty_cells)
+        with profiler.phase("draw_metrics"):
+            self.draw_metrics()
+            self.draw_game_over()
+        if self.show_profile:
+            with profiler.phase("draw_profile"):
+                self.draw_profile()
+
+        with profiler.phase("display"):
+            if full:
+                pygame.display.flip()
+            else:
+                pygame.display.update([self.cell_rect(cell) for cell in dirty_cells] + [self.hud_rect])
+        self.drawn_cells = cells
+        self.full_redraw = self.game_over
 
     def run(self):
+        profiler = self.profiler
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
+            with profiler.phase("frame"):
+                with profiler.phase("handle_events"):
+                    self.handle_events()
+                with profiler.phase("update"):
+                    self.update()
+                self.draw()
+            profiler.end_frame()
             self.clock.tick(30)  # FPS 
 
+        if self.export_profile:
+            profiler.export(self.profile_path)
+        self.close()
+        if self.recorder:
+            self.recorder.close(self.tick)
         pygame.quit()
         sys.exit()
 
 
-def create_maze_layout(width, height):
-    """Create a simple maze layout with walls around the edges and some internal walls"""
-    layout = [[PATH for _ in range(width)] for _ in range(height)]
+def roster_option(text):
+    try:
+        return parse_roster(text)
+    except ValueError as error:  # argparse shows the message of this error type only
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def milliseconds_option(text):
+    value = float(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"{text} is negative")
+    return value
 
-    with open(map_path, 'r') as file:
-        reader = csv.reader(file)
-        for y, row in enumerate(reader):
-            for x, cell in enumerate(row):
-                if cell == '1':
-                    layout[y][x] = WALL
-                else:
-                    layout[y][x] = PATH
-    
-    return layout
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pac-Man search algorithms")
+    parser.add_argument("--seed", type=int, help="shuffle neighbor order with this seed")
+    parser.add_argument("--record", metavar="PATH", help="log the session for replay.py")
+    parser.add_argument("--profile", metavar="PATH", help="profile every frame and export to a .json or .csv file on exit")
+    parser.add_argument("--corridors", action="store_true", help="search a graph with corridors contracted to edges")
+    parser.add_argument("--autopilot", nargs="?", type=milliseconds_option, const=10, metavar="MS",
+                        help="let a search drive Pac-Man, spending MS milliseconds on each of his moves "
+                             "(default 10, 0 looks one move ahead)")
+    parser.add_argument("--ghosts", type=roster_option, metavar="ROSTER",
+                        help="ghosts of the swarm level (8) as kind:count, e.g. cyan:32,red:2 (default cyan:64)")
+    args = parser.parse_args(argv)
 
-def main():
     # Create a maze layout
     maze_layout = create_maze_layout(32, 28)
     
     # Create and run the game
-    game = Game(maze_layout)
+    # A recorded session plans sequentially so that its replay is exact
+    game = Game(maze_layout, planner_mode=None if args.record else "thread", neighbor_seed=args.seed,
+                record_path=args.record, profile_path=args.profile, corridors=args.corridors,
+                autopilot=args.autopilot is not None,
+                autopilot_budget=(args.autopilot if args.autopilot is not None else 10) / 1000, swarm_roster=args.ghosts)
     game.run()
 
 
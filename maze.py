@@ -0,0 +1,195 @@
+import mmap
+import os
+import random
+import struct
+from array import array
+
+from constants import WALL, PATH, NEIGHBOR_DIRECTIONS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up building the adjacency of very large maps
+    np = None
+
+map_path ='pacman_map1.csv'
+
+CELL_VALUES = bytes.maketrans(b'01', bytes([PATH, WALL]))
+CSV_CHARS = bytes.maketrans(bytes([PATH, WALL]), b'01')
+MAZE_CACHE_MAGIC = b'PMZ1'
+MAZE_CACHE_HEADER = struct.Struct('<4sII')  # magic, width, height; followed by width * height cell bytes
+
+
+class Maze:
+    def __init__(self, layout, neighbor_seed=None):
+        self.layout = layout
+        self.height = len(layout)
+        self.width = len(layout[0])
+        self.cells = bytearray(b''.join(bytes(row) for row in layout))  # row-major WALL/PATH bytes
+        self.build_adjacency(neighbor_seed)
+
+    def build_adjacency(self, neighbor_seed=None):
+        """Index cells as ids y * width + x and store their open neighbors CSR-style.
+
+        Neighbors of cell c are neighbor_ids[neighbor_offsets[c]:neighbor_offsets[c + 1]].
+        Without a seed the order is fixed (down, right, up, left); with one, every row is
+        shuffled once by a seeded RNG so runs stay random but reproducible.
+        """
+        if np is not None:
+            offsets, neighbor_ids = csr_adjacency_numpy(self.cells, self.width, self.height)
+        else:
+            offsets, neighbor_ids = csr_adjacency(self.cells, self.width, self.height)
+        if neighbor_seed is not None:
+            rng = random.Random(neighbor_seed)
+            for cell in range(len(offsets) - 1):
+                start, end = offsets[cell], offsets[cell + 1]
+                if end - start > 1:
+                    row = neighbor_ids[start:end]
+                    rng.shuffle(row)
+                    neighbor_ids[start:end] = row
+        self.neighbor_offsets = offsets
+        self.neighbor_ids = neighbor_ids
+
+    def cell_id(self, position):
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def cell_position(self, cell):
+        y, x = divmod(cell, self.width)
+        return (x, y)
+
+    def cell_positions(self, cells):
+        return [self.cell_position(cell) for cell in cells]
+
+    def is_valid_position(self, position):
+        x, y = position
+        return (0 <= x < self.width and 
+                0 <= y < self.height and 
+                self.cells[y * self.width + x] == PATH)
+
+    def get_neighbors(self, position):
+        cell = self.cell_id(position)
+        if cell < 0:
+            return []
+        start, end = self.neighbor_offsets[cell], self.neighbor_offsets[cell + 1]
+        return [self.cell_position(n) for n in self.neighbor_ids[start:end]]
+
+
+def csr_adjacency(cells, width, height):
+    """Pure-Python CSR build over the flat cell bytes"""
+    steps = [(dx, dy, dy * width + dx) for dx, dy in NEIGHBOR_DIRECTIONS]
+    offsets = array('i', [0])
+    neighbor_ids = array('i')
+    for cell in range(width * height):
+        if cells[cell] == PATH:
+            y, x = divmod(cell, width)
+            for dx, dy, delta in steps:
+                if 0 <= x + dx < width and 0 <= y + dy < height and cells[cell + delta] == PATH:
+                    neighbor_ids.append(cell + delta)
+        offsets.append(len(neighbor_ids))
+    return offsets, neighbor_ids
+
+
+def csr_adjacency_numpy(cells, width, height, block_cells=1 << 20):
+    """Same arrays as csr_adjacency, built with array shifts a block of rows at a time"""
+    open_cells = np.zeros((height + 2, width + 2), dtype=bool)  # padded with walls
+    open_cells[1:-1, 1:-1] = np.frombuffer(bytes(cells), dtype=np.uint8).reshape(height, width) == PATH
+    rows_per_block = max(1, block_cells // width)
+    counts = []
+    neighbor_blocks = []
+    for y0 in range(0, height, rows_per_block):
+        y1 = min(height, y0 + rows_per_block)
+        center = open_cells[1 + y0:1 + y1, 1:-1]
+        ids = np.arange(y0 * width, y1 * width, dtype=np.int32).reshape(y1 - y0, width)
+        columns = []
+        for dx, dy in NEIGHBOR_DIRECTIONS:
+            valid = center & open_cells[1 + y0 + dy:1 + y1 + dy, 1 + dx:1 + dx + width]
+            columns.append(np.where(valid, ids + (dy * width + dx), -1).ravel())
+        block = np.stack(columns, axis=1)  # one row of candidate neighbors per cell, in direction order
+        counts.append((block >= 0).sum(axis=1))
+        neighbor_blocks.append(block[block >= 0])
+    offsets = np.zeros(width * height + 1, dtype=np.int32)
+    np.cumsum(np.concatenate(counts), out=offsets[1:])
+    return (array('i', offsets.astype(np.int32).tobytes()),
+            array('i', np.concatenate(neighbor_blocks).astype(np.int32).tobytes()))
+
+
+def layout_rows(cells, width, height):
+    # Row views share the flat buffer, so layout[y][x] still works without per-cell objects
+    view = memoryview(cells)
+    return [view[y * width:(y + 1) * width] for y in range(height)]
+
+
+def parse_maze_csv(data):
+    """Parse CSV map bytes in bulk into (width, height, cells); '1' is a wall, '0' is open"""
+    rows = [line.replace(b',', b'').replace(b' ', b'').replace(b'\t', b'') for line in data.splitlines()]
+    rows = [row for row in rows if row]
+    if not rows:
+        raise ValueError("Map is empty")
+    width = len(rows[0])
+    for y, row in enumerate(rows):
+        if len(row) != width:
+            raise ValueError(f"Map row {y} has {len(row)} cells, expected {width}")
+    cells = bytearray(b''.join(rows))
+    if cells.translate(None, b'01'):
+        raise ValueError("Map cells must be 0 or 1")
+    return width, len(rows), cells.translate(CELL_VALUES)
+
+
+def save_maze_csv(layout, path):
+    """Write a layout as a CSV map that parse_maze_csv reads back"""
+    with open(path, 'wb') as file:
+        for row in layout:
+            line = bytearray(b',' * (2 * len(row) - 1))
+            line[::2] = bytes(row).translate(CSV_CHARS)
+            file.write(line + b'\n')
+
+
+def save_maze_cache(layout, path):
+    """Write a layout in the binary cache format that load_maze_cache memory-maps"""
+    with open(path, 'wb') as file:
+        file.write(MAZE_CACHE_HEADER.pack(MAZE_CACHE_MAGIC, len(layout[0]), len(layout)))
+        for row in layout:
+            file.write(bytes(row))
+
+
+def load_maze_cache(path):
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, width, height = MAZE_CACHE_HEADER.unpack_from(data)
+    if magic != MAZE_CACHE_MAGIC:
+        raise ValueError(f"{path} is not a maze cache file")
+    if len(data) != MAZE_CACHE_HEADER.size + width * height:
+        raise ValueError(f"{path} should hold {width}x{height} cells but has {len(data) - MAZE_CACHE_HEADER.size}")
+    return layout_rows(memoryview(data)[MAZE_CACHE_HEADER.size:], width, height)
+
+
+def load_maze_layout(path, use_cache=False):
+    """Load a map from CSV or from the binary cache format (detected by its header).
+
+    With use_cache, a CSV map is also written to path + '.pmz' and later loads
+    memory-map that file while it is newer than the CSV.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(MAZE_CACHE_MAGIC)) == MAZE_CACHE_MAGIC:
+            return load_maze_cache(path)
+
+    cache_path = path + '.pmz'
+    if use_cache and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        return load_maze_cache(cache_path)
+
+    with open(path, 'rb') as file:
+        width, height, cells = parse_maze_csv(file.read())
+    layout = layout_rows(cells, width, height)
+    if use_cache:
+        save_maze_cache(layout, cache_path)
+    return layout
+
+
+def create_maze_layout(width, height, path=None):
+    """Load the game map (map_path unless a path is given) and check it is width x height"""
+    layout = load_maze_layout(path or map_path)
+    if (len(layout[0]), len(layout)) != (width, height):
+        raise ValueError(f"Map is {len(layout[0])}x{len(layout)}, expected {width}x{height}")
+    return layout
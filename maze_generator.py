@@ -0,0 +1,177 @@
+"""Seeded procedural maps in the loader's format, from 32x28 up to 4096x4096.
+
+Styles:
+    rooms     open room_size x room_size rooms joined by doors, with extra doors
+              so there are several routes
+    perfect   corridor maze with exactly one route between any two cells
+    braided   perfect maze with every dead end knocked through into a loop
+    random    independent walls, each interior cell a wall with probability density
+
+    python maze_generator.py 512 512 --style braided --seed 3 --output braided_512.csv
+"""
+import argparse
+import random
+import sys
+
+from constants import PATH, WALL
+from maze import layout_rows, save_maze_csv, save_maze_cache
+
+STYLES = ("rooms", "perfect", "braided", "random")
+
+# style: (room size, chance a dead end room gets an extra door)
+ROOM_STYLES = {
+    "rooms": (6, 0.5),
+    "perfect": (1, 0),
+    "braided": (1, 1),
+}
+
+MIN_SIZE = 8
+
+
+def spanning_tree(columns, rows, rng):
+    """Randomized depth-first spanning tree of a columns x rows grid; returns (room, room) edges"""
+    visited = bytearray(columns * rows)
+    start = rng.randrange(columns * rows)
+    visited[start] = 1
+    stack = [start]
+    edges = []
+    while stack:
+        room = stack[-1]
+        row, column = divmod(room, columns)
+        options = []
+        if column > 0 and not visited[room - 1]:
+            options.append(room - 1)
+        if column < columns - 1 and not visited[room + 1]:
+            options.append(room + 1)
+        if row > 0 and not visited[room - columns]:
+            options.append(room - columns)
+        if row < rows - 1 and not visited[room + columns]:
+            options.append(room + columns)
+        if not options:
+            stack.pop()
+            continue
+        next_room = options[rng.randrange(len(options))] if len(options) > 1 else options[0]
+        visited[next_room] = 1
+        edges.append((room, next_room))
+        stack.append(next_room)
+    return edges
+
+
+def braid(edges, columns, rows, chance, rng):
+    """Add an edge to a new neighbor for each dead end room, with probability chance"""
+    degree = bytearray(columns * rows)
+    linked = set()
+    for a, b in edges:
+        degree[a] += 1
+        degree[b] += 1
+        linked.add((min(a, b), max(a, b)))
+    for room in range(columns * rows):
+        if degree[room] != 1 or rng.random() >= chance:
+            continue
+        row, column = divmod(room, columns)
+        options = [other for other, ok in ((room - 1, column > 0), (room + 1, column < columns - 1),
+                                           (room - columns, row > 0), (room + columns, row < rows - 1))
+                   if ok and (min(room, other), max(room, other)) not in linked]
+        if options:
+            other = options[rng.randrange(len(options))]
+            edges.append((room, other))
+            linked.add((min(room, other), max(room, other)))
+            degree[room] += 1
+            degree[other] += 1
+    return edges
+
+
+def carve_rooms(cells, width, height, room_size, chance, rng):
+    """Grid of open rooms separated by one-cell walls, linked by a braided spanning tree.
+
+    The last column and row of rooms stretch to fill what is left of the map.
+    """
+    step = room_size + 1
+    columns, rows = (width - 1) // step, (height - 1) // step
+    if columns < 1 or rows < 1:
+        raise ValueError(f"{width}x{height} is too small for rooms of {room_size} cells")
+    room_widths = [room_size] * (columns - 1) + [width - 2 - (columns - 1) * step]
+    room_heights = [room_size] * (rows - 1) + [height - 2 - (rows - 1) * step]
+    for row in range(rows):
+        for y in range(1 + row * step, 1 + row * step + room_heights[row]):
+            for column in range(columns):
+                x = 1 + column * step
+                cells[y * width + x:y * width + x + room_widths[column]] = bytes([PATH]) * room_widths[column]
+
+    edges = spanning_tree(columns, rows, rng)
+    if chance:
+        braid(edges, columns, rows, chance, rng)
+    for a, b in edges:
+        a, b = min(a, b), max(a, b)
+        row, column = divmod(a, columns)
+        if b == a + 1:  # door in the wall column right of a
+            x, y = (column + 1) * step, 1 + row * step + rng.randrange(room_heights[row])
+        else:  # door in the wall row below a
+            x, y = 1 + column * step + rng.randrange(room_widths[column]), (row + 1) * step
+        cells[y * width + x] = PATH
+
+
+def scatter_walls(cells, width, height, density, rng):
+    # One random byte per cell, mapped through a threshold table
+    threshold = round(density * 256)
+    table = bytes([WALL if value < threshold else PATH for value in range(256)])
+    for y in range(1, height - 1):
+        cells[y * width + 1:(y + 1) * width - 1] = rng.randbytes(width - 2).translate(table)
+
+
+def open_spawns(cells, width, height):
+    """Open Pac-Man's and the ghosts' start cells (see Simulation) and a straight way into the map"""
+    for x, y, dx, dy in [(1, height - 2, 0, -1)] + [(width - 2, y, -1, 0) for y in range(1, 5)]:
+        cells[y * width + x] = PATH
+        x += dx
+        y += dy
+        while 0 < x < width - 1 and 0 < y < height - 1 and cells[y * width + x] != PATH:
+            cells[y * width + x] = PATH
+            x += dx
+            y += dy
+
+
+def generate_maze(width, height, style="perfect", seed=0, density=0.3, room_size=None, braid_chance=None):
+    """Returns a layout (rows of WALL/PATH bytes, as load_maze_layout gives) with a wall border.
+
+    room_size and braid_chance override the style's defaults (ROOM_STYLES);
+    density is only used by the random style.
+    """
+    if style not in STYLES:
+        raise ValueError(f"Unknown maze style {style!r}, expected one of {', '.join(STYLES)}")
+    if width < MIN_SIZE or height < MIN_SIZE:
+        raise ValueError(f"Maps must be at least {MIN_SIZE}x{MIN_SIZE}, got {width}x{height}")
+    rng = random.Random(seed)
+    cells = bytearray([WALL]) * (width * height)
+    if style == "random":
+        scatter_walls(cells, width, height, density, rng)
+    else:
+        default_size, default_chance = ROOM_STYLES[style]
+        carve_rooms(cells, width, height, room_size or default_size,
+                    default_chance if braid_chance is None else braid_chance, rng)
+    open_spawns(cells, width, height)
+    return layout_rows(cells, width, height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded maze map")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("--style", default="perfect", choices=STYLES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.3, help="wall probability of the random style")
+    parser.add_argument("--room-size", type=int, help="room width in cells (rooms style default 6)")
+    parser.add_argument("--braid", type=float, help="chance a dead end gets an extra door")
+    parser.add_argument("--output", required=True, help="a .csv map, or .pmz for the binary cache format")
+    args = parser.parse_args(argv)
+
+    layout = generate_maze(args.width, args.height, args.style, args.seed, args.density, args.room_size, args.braid)
+    if args.output.endswith(".pmz"):
+        save_maze_cache(layout, args.output)
+    else:
+        save_maze_csv(layout, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import itertools
+import math
+import pickle
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from time import perf_counter
+
+from maze import Maze, layout_rows
+from ghosts import Ghost
+from instrumentation import Instrumentation
+
+THREAD = "thread"
+PROCESS = "process"
+
+worker_maze = None  # Maze rebuilt once in each worker process
+worker_ghosts = {}  # ghost key -> planning copy living in this worker process
+
+
+def init_process_worker(cells, width, height, instrumentation_mode):
+    global worker_maze
+    worker_maze = Maze(layout_rows(bytearray(cells), width, height))
+    Ghost.instrumentation = Instrumentation(instrumentation_mode)
+
+
+def plan(ghost, maze, start, target_position):
+    """Search from start with a planning copy; returns (path or None if unreachable, metrics)"""
+    ghost.position = start
+    ghost.path = None
+    metrics = ghost.find_path(maze, target_position)
+    return ghost.path, metrics
+
+
+def plan_in_process(key, template, start, target_position, instrumentation_mode):
+    # The mode can change in game (M) after the worker started
+    Ghost.instrumentation.mode = instrumentation_mode
+    ghost = worker_ghosts.get(key)
+    if ghost is None:
+        ghost = worker_ghosts[key] = pickle.loads(template)
+        ghost.set_maze(worker_maze)
+    return plan(ghost, worker_maze, start, target_position)
+
+
+class PlanJob:
+    __slots__ = ("future", "start", "target_position", "dispatched", "stale")
+
+    def __init__(self, future, start, target_position):
+        self.future = future
+        self.start = start
+        self.target_position = target_position
+        self.dispatched = perf_counter()
+        self.stale = False
+
+
+class ParallelPlanner:
+    """Runs ghost searches on a worker pool so the frame loop never waits for them.
+
+    request() mirrors Ghost.update_path: it repairs the path when it can and
+    otherwise queues the search; collect(), called once per tick, hands
+    finished paths back to their ghosts. Each ghost has at most one search in
+    flight. A result that arrives after deadline seconds is dropped and the
+    ghost keeps following its previous path.
+
+    THREAD mode shares the read-only maze with the workers (searches still take
+    turns on the GIL, but the frame loop is no longer blocked by them). PROCESS
+    mode rebuilds the maze once per worker and runs the searches truly in
+    parallel. Every ghost is searched with its planning_copy(), so the live ghost
+    is only touched on the main thread.
+    """
+
+    def __init__(self, maze, mode=THREAD, workers=4, deadline=0.25):
+        if mode not in (THREAD, PROCESS):
+            raise ValueError(f"Unknown planner mode {mode!r}, expected {THREAD!r} or {PROCESS!r}")
+        self.maze = maze
+        self.mode = mode
+        self.deadline = deadline
+        if mode == THREAD:
+            self.pool = ThreadPoolExecutor(max_workers=workers)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_process_worker,
+                                            initargs=(bytes(maze.cells), maze.width, maze.height,
+                                                      Ghost.instrumentation.mode))
+        self.keys = {}  # ghost -> key of its planning copy
+        self.copies = {}  # key -> planning copy (thread mode) or its pickled template (process mode)
+        self.next_key = itertools.count()
+        self.jobs = {}  # ghost -> PlanJob in flight
+        self.wanted = {}  # ghost -> newest target not dispatched yet
+        self.completed = 0
+        self.late = 0
+
+    def request(self, ghost, target_position):
+        if target_position != ghost.last_target_position:
+            # A repair is only safe while no search is in flight to overwrite it
+            if ghost not in self.jobs:
+                if ghost.repair_path(self.maze, target_position):
+                    ghost.repair_hits += 1
+                    ghost.last_target_position = target_position
+                    self.wanted.pop(ghost, None)
+                    return
+                ghost.repair_misses += 1
+            ghost.last_target_position = target_position
+            self.wanted[ghost] = target_position
+            self.dispatch(ghost)
+
+    def dispatch(self, ghost):
+        if ghost in self.jobs or ghost not in self.wanted:
+            return
+        target_position = self.wanted.pop(ghost)
+        key = self.keys.get(ghost)
+        if key is None:
+            key = self.keys[ghost] = next(self.next_key)
+            planning_copy = ghost.planning_copy()
+            self.copies[key] = planning_copy if self.mode == THREAD else pickle.dumps(planning_copy)
+
+        if self.mode == THREAD:
+            future = self.pool.submit(plan, self.copies[key], self.maze, ghost.position, target_position)
+        else:
+            future = self.pool.submit(plan_in_process, key, self.copies[key], ghost.position, target_position,
+                                      Ghost.instrumentation.mode)
+        self.jobs[ghost] = PlanJob(future, ghost.position, target_position)
+
+    def collect(self):
+        """Apply every finished search; never blocks"""
+        now = perf_counter()
+        for ghost, job in list(self.jobs.items()):
+            if not job.future.done():
+                continue
+            del self.jobs[ghost]
+            path, metrics = job.future.result()
+            if job.stale:
+                pass  # dispatched before a reset
+            elif now - job.dispatched > self.deadline:
+                self.late += 1
+                if ghost.last_target_position == job.target_position:
+                    ghost.last_target_position = None  # so the next request searches again
+            else:
+                self.completed += 1
+                ghost.metrics = metrics
+                if path is not None:
+                    self.apply_path(ghost, job, path)
+            self.dispatch(ghost)  # a newer target may have arrived meanwhile
+
+    def apply_path(self, ghost, job, path):
+        if ghost.position == job.start:
+            ghost.path = path
+        elif ghost.position in path:
+            # The ghost kept moving while the search ran; drop the part already walked
+            ghost.path = deque(itertools.islice(path, path.index(ghost.position) + 1, None))
+        else:
+            return
+        found = (path[-1] if path else job.start) == job.target_position
+        ghost.path_excess = 0 if found and ghost.optimal else math.inf
+
+    def forget(self):
+        """Drop pending work, e.g. after a reset teleports the ghosts"""
+        self.wanted.clear()
+        for ghost, job in list(self.jobs.items()):
+            if job.future.cancel():
+                del self.jobs[ghost]
+            else:
+                # Still running on the ghost's planning copy; wait for it but ignore the result
+                job.stale = True
+
+    def shutdown(self):
+        self.forget()
+        self.pool.shutdown(wait=False, cancel_futures=True)
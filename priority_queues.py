@@ -0,0 +1,95 @@
+"""Frontiers for the unit-cost searches (OrangeGhost, RedGhost).
+
+Every queue takes entries as tuples whose first field is a non-negative int
+priority and pops the entry with the lowest one. The heap is a plain list run
+by heapq and breaks ties by comparing the rest of the tuple. BucketQueue and RadixHeap rely
+on priorities never dropping below the last one popped, which holds for UCS and
+for A* with a consistent heuristic when every move costs 1. They break ties
+LIFO, so among equal f-values A* expands the deepest, most recently reached
+node first.
+"""
+import heapq
+
+
+class BucketQueue:
+    """Dial's bucket queue: one LIFO list per priority and a cursor that only moves forward"""
+
+    def __init__(self):
+        self.buckets = []
+        self.base = None  # priority of buckets[0], the first priority pushed
+        self.current = 0  # index of the lowest bucket that may hold entries
+        self.size = 0
+
+    def push(self, entry):
+        if self.base is None:
+            self.base = entry[0]
+        index = entry[0] - self.base
+        if index < self.current:
+            raise ValueError(f"Priority {entry[0]} is below the last one popped ({self.base + self.current})")
+        buckets = self.buckets
+        if index >= len(buckets):
+            buckets.extend([] for _ in range(index + 1 - len(buckets)))
+        buckets[index].append(entry)
+        self.size += 1
+
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from an empty queue")
+        buckets = self.buckets
+        current = self.current
+        while not buckets[current]:
+            current += 1
+        self.current = current
+        self.size -= 1
+        return buckets[current].pop()
+
+    def __len__(self):
+        return self.size
+
+
+class RadixHeap:
+    """Monotone radix heap: bucket i holds priorities whose highest bit differing from the last pop is bit i - 1.
+
+    A pop that finds bucket 0 empty moves the lowest non-empty bucket down
+    around its minimum, so each entry moves at most once per bit.
+    """
+
+    def __init__(self):
+        self.buckets = [[] for _ in range(65)]
+        self.last = 0
+        self.size = 0
+
+    def push(self, entry):
+        priority = entry[0]
+        if priority < self.last:
+            raise ValueError(f"Priority {priority} is below the last one popped ({self.last})")
+        self.buckets[(priority ^ self.last).bit_length()].append(entry)
+        self.size += 1
+
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from an empty queue")
+        buckets = self.buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            bucket = buckets[i]
+            buckets[i] = []
+            last = self.last = min(entry[0] for entry in bucket)
+            for entry in bucket:  # in push order, so ties still pop LIFO
+                buckets[(entry[0] ^ last).bit_length()].append(entry)
+        self.size -= 1
+        return buckets[0].pop()
+
+    def __len__(self):
+        return self.size
+
+
+# name: (new queue, push(queue, entry), pop(queue)); searches call the functions directly,
+# so the heap costs exactly what inline heapq calls do
+QUEUES = {
+    "heap": (list, heapq.heappush, heapq.heappop),
+    "bucket": (BucketQueue, BucketQueue.push, BucketQueue.pop),
+    "radix": (RadixHeap, RadixHeap.push, RadixHeap.pop),
+}
@@ -0,0 +1,203 @@
+"""Record game sessions and replay them headlessly.
+
+A session file is JSONL: a header line with the map, the neighbor seed and the
+starting state, then one [tick, action, value] line per input change. Replays
+run the ticks at full speed without pygame and write the search metrics of
+every tick, so two builds can be diffed on exactly the same workload.
+
+    python main.py --record session.jsonl
+    python replay.py session.jsonl --output metrics.csv
+"""
+import argparse
+import csv
+import json
+import sys
+
+from constants import PATH, WALL
+from maze import parse_maze_csv, layout_rows
+from instrumentation import Instrumentation, MODES, TIMING
+from ghosts import Ghost
+from simulation import Simulation, INCREMENTAL_LEVEL, SWARM_LEVEL
+
+SESSION_VERSION = 1
+CELL_CHARS = bytes.maketrans(bytes([PATH, WALL]), b'01')
+
+# Actions a session line can hold; "direction" is only written when it changes
+DIRECTION, LEVEL, RESET, TOGGLE, AUTOPILOT, END = "direction", "level", "reset", "toggle", "autopilot", "end"
+
+
+class RecordedPilot:
+    """Stands in for the Autopilot in a replay, answering with the directions it logged"""
+
+    def __init__(self):
+        self.direction = None
+
+    def choose(self, simulation):
+        return self.direction
+
+
+class SessionRecorder:
+    """Appends the inputs a Simulation receives to a session file"""
+
+    def __init__(self, path, simulation):
+        self.file = open(path, "w")
+        self.direction = None
+        maze = simulation.maze
+        self.write({
+            "version": SESSION_VERSION,
+            "width": maze.width,
+            "height": maze.height,
+            "layout": [bytes(maze.cells[y * maze.width:(y + 1) * maze.width]).translate(CELL_CHARS).decode()
+                       for y in range(maze.height)],
+            "neighbor_seed": simulation.neighbor_seed,
+            "swarm_size": simulation.swarm_size,
+            "swarm_roster": simulation.swarm_roster,
+            "swarm_seed": simulation.swarm_seed,
+            "corridors": simulation.corridors,
+            "planner_mode": simulation.planner_mode,  # informational; replays always plan sequentially
+            "level": simulation.level,
+            "user_controlled": simulation.user_controlled,
+            "ghost_move": simulation.ghost_move,
+            "autopilot": simulation.autopilot is not None,
+            "tick": simulation.tick,
+        })
+
+    def write(self, item):
+        self.file.write(json.dumps(item, separators=(",", ":")) + "\n")
+
+    def record(self, tick, action, value=None):
+        self.write([tick, action, value])
+
+    def record_direction(self, tick, direction):
+        if direction != self.direction:
+            self.direction = direction
+            self.record(tick, DIRECTION, direction)
+
+    def close(self, tick):
+        if not self.file.closed:
+            self.record(tick, END)
+            self.file.close()
+
+
+def load_session(path):
+    """Returns (header, [(tick, action, value), ...])"""
+    with open(path) as file:
+        header = json.loads(file.readline())
+        if header.get("version") != SESSION_VERSION:
+            raise ValueError(f"{path}: unsupported session version {header.get('version')!r}")
+        events = [tuple(json.loads(line)) for line in file if line.strip()]
+    return header, events
+
+
+def session_simulation(header):
+    width, height, cells = parse_maze_csv("\n".join(header["layout"]).encode())
+    simulation = Simulation(layout_rows(cells, width, height), swarm_size=header["swarm_size"],
+                            swarm_seed=header["swarm_seed"], neighbor_seed=header["neighbor_seed"],
+                            corridors=header.get("corridors", False), swarm_roster=header.get("swarm_roster"))
+    simulation.set_level(header["level"])
+    simulation.user_controlled = header["user_controlled"]
+    simulation.ghost_move = header["ghost_move"]
+    simulation.tick = header["tick"]
+    if header.get("autopilot"):
+        simulation.autopilot = RecordedPilot()
+    return simulation
+
+
+def apply_event(simulation, action, value):
+    if action == LEVEL:
+        simulation.set_level(value)
+    elif action == RESET:
+        simulation.reset_game()
+    elif action == TOGGLE:
+        simulation.toggle_running()
+    elif action == AUTOPILOT:
+        simulation.autopilot = RecordedPilot() if value else None
+    elif action not in (DIRECTION, END):
+        raise ValueError(f"Unknown session action {action!r}")
+
+
+def tick_metrics(simulation, previous):
+    """Rows for every search that ran since previous ({source: metrics dict} from the last call)"""
+    sources = list(simulation.ghosts)
+    if simulation.level == INCREMENTAL_LEVEL:
+        sources.append(simulation.purple)
+    if simulation.level == SWARM_LEVEL:
+        sources.append(simulation.swarm_planner)
+    rows = []
+    for source in sources:
+        metrics = source.metrics
+        if previous.get(source) is not metrics:  # find_path/step replace the dict on every search
+            previous[source] = metrics
+            name = getattr(source, "name", "Swarm")
+            rows.append((name, metrics["search_time"], metrics["memory_usage"], metrics["nodes_expanded"]))
+    return rows
+
+
+def replay(path, max_ticks=None):
+    """Re-run a recorded session; returns (tick, ghost, search_time, memory_usage, nodes_expanded) rows"""
+    header, events = load_session(path)
+    simulation = session_simulation(header)
+    end = max((tick for tick, action, _ in events if action == END), default=None)
+    if end is None:
+        end = events[-1][0] + 1 if events else simulation.tick
+    if max_ticks is not None:
+        end = min(end, simulation.tick + max_ticks)
+
+    previous = {}
+    tick_metrics(simulation, previous)  # searches before the first tick are not part of the run
+    rows = []
+    direction = None
+    i = 0
+    while simulation.tick < end:
+        while i < len(events) and events[i][0] <= simulation.tick:
+            _, action, value = events[i]
+            if action == DIRECTION:
+                direction = tuple(value) if value is not None else None
+            else:
+                apply_event(simulation, action, value)
+            i += 1
+        if simulation.autopilot is not None:
+            simulation.autopilot.direction = direction
+        tick = simulation.tick
+        simulation.update(direction)
+        rows.extend((tick,) + row for row in tick_metrics(simulation, previous))
+    return rows
+
+
+def write_metrics(rows, output):
+    fields = ["tick", "ghost", "search_time", "memory_usage", "nodes_expanded"]
+    with open(output, "w", newline="") as file:
+        if output.endswith(".jsonl"):
+            for row in rows:
+                file.write(json.dumps(dict(zip(fields, row))) + "\n")
+        else:
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session headlessly")
+    parser.add_argument("session", help="session file written by main.py --record")
+    parser.add_argument("--instrumentation", default=TIMING, choices=MODES)
+    parser.add_argument("--max-ticks", type=int)
+    parser.add_argument("--output", help="write per-tick metrics to a .csv or .jsonl file")
+    args = parser.parse_args(argv)
+
+    Ghost.instrumentation = Instrumentation(args.instrumentation)
+    rows = replay(args.session, args.max_ticks)
+    totals = {}
+    for _, ghost, search_time, _, nodes_expanded in rows:
+        total = totals.setdefault(ghost, [0, 0, 0])
+        total[0] += 1
+        total[1] += search_time
+        total[2] += nodes_expanded
+    for ghost, (searches, search_time, nodes_expanded) in totals.items():
+        print(f"{ghost:<28} searches={searches:<6} time={search_time * 1000:.3f} ms  nodes={nodes_expanded}")
+    if args.output:
+        write_metrics(rows, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Scalability suite: how every ghost algorithm grows with the map.
+
+Generates seeded maps of each style and size (maze_generator.py), runs the
+benchmark on each one and plots search time, memory and nodes expanded against
+the number of cells. Results can be saved as a baseline and later runs compared
+against it: nodes expanded must not grow at all (searches are deterministic
+for a seed), time and memory must stay within a tolerance.
+
+    python scaling.py --sizes 32x28 256x256 1024x1024 --plot scaling.png --save-baseline baseline.json
+    python scaling.py --sizes 32x28 256x256 1024x1024 --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+
+from maze import save_maze_cache
+from maze_generator import STYLES, generate_maze
+from instrumentation import MODES, FULL
+from benchmark import ALGORITHMS, run_benchmark
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")  # headless, no display needed
+    import matplotlib.pyplot as plt
+except ImportError:  # plots are optional; results and baselines work without them
+    plt = None
+
+DEFAULT_SIZES = ["32x28", "64x64", "128x128", "256x256", "512x512"]
+
+# summary column: axis label
+PLOTTED = {
+    "time_ms_p50": "search time p50 (ms)",
+    "memory_kb_p50": "peak memory p50 (KB)",
+    "nodes_mean": "nodes expanded (mean)",
+}
+
+# Differences below these are measurement noise, not regressions
+NOISE_FLOOR = {"time_ms_p50": 0.05, "memory_kb_p50": 1.0}
+
+
+def parse_size(text):
+    width, _, height = text.partition("x")
+    return int(width), int(height or width)
+
+
+def generate_maps(styles, sizes, seed, directory):
+    """Write (or reuse) one map per style and size; returns [(style, width, height, path)]"""
+    os.makedirs(directory, exist_ok=True)
+    maps = []
+    for style in styles:
+        for width, height in sizes:
+            path = os.path.join(directory, f"{style}_{width}x{height}_s{seed}.pmz")
+            if not os.path.exists(path):
+                save_maze_cache(generate_maze(width, height, style, seed), path)
+            maps.append((style, width, height, path))
+    return maps
+
+
+def run_suite(styles, sizes, algorithms, pairs, seed=0, workers=None, instrumentation_mode=FULL,
+              directory="generated_maps"):
+    """Benchmark every map on its own pool so that workers only load one map at a time"""
+    results = []
+    for style, width, height, path in generate_maps(styles, sizes, seed, directory):
+        chunk_size = max(1, -(-pairs // (workers or os.cpu_count())))  # spread each map over every worker
+        summaries = run_benchmark([path], algorithms, pairs, seed, workers, chunk_size, instrumentation_mode)
+        for summary in summaries:
+            del summary["map"]
+            results.append(dict(style=style, width=width, height=height, cells=width * height, seed=seed,
+                                instrumentation=instrumentation_mode, **summary))
+    return results
+
+
+def result_key(result):
+    return result["style"], result["width"], result["height"], result["algorithm"]
+
+
+def compare(results, baseline, tolerance=0.5):
+    """Regressions of results against a baseline, as printable lines.
+
+    Only runs over the same pairs (seed and count) are compared, and time and
+    memory only between runs with the same instrumentation mode.
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or (old["seed"], old["runs"]) != (result["seed"], result["runs"]):
+            continue
+        name = "{} {}x{} {}".format(*result_key(result))
+        if result["nodes_mean"] > old["nodes_mean"]:
+            regressions.append(f"{name}: nodes_mean {old['nodes_mean']} -> {result['nodes_mean']}")
+        if result["instrumentation"] != old["instrumentation"]:
+            continue
+        for column, floor in NOISE_FLOOR.items():
+            if result[column] > old[column] * (1 + tolerance) and result[column] - old[column] > floor:
+                regressions.append(f"{name}: {column} {old[column]:.3f} -> {result[column]:.3f}")
+    return regressions
+
+
+def plot(results, output):
+    """One row of log-log charts per style: time, memory and nodes against cells"""
+    styles = list(dict.fromkeys(result["style"] for result in results))
+    algorithms = list(dict.fromkeys(result["algorithm"] for result in results))
+    colors = plt.get_cmap("tab20")  # the default cycle repeats after ten lines
+    figure, axes = plt.subplots(len(styles), len(PLOTTED), figsize=(5 * len(PLOTTED), 4 * len(styles)),
+                                squeeze=False)
+    for row, style in enumerate(styles):
+        for column, (metric, label) in enumerate(PLOTTED.items()):
+            ax = axes[row][column]
+            for i, algorithm in enumerate(algorithms):
+                points = sorted((result["cells"], result[metric]) for result in results
+                                if result["style"] == style and result["algorithm"] == algorithm)
+                if any(value > 0 for _, value in points):
+                    ax.plot(*zip(*points), marker="o", label=algorithm, color=colors(i % colors.N))
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.set_title(f"{style}: {label}")
+            ax.set_xlabel("cells")
+    handles, labels = axes[0][0].get_legend_handles_labels()
+    figure.legend(handles, labels, loc="lower center", ncol=min(len(labels), 6))
+    figure.tight_layout(rect=(0, 0.06, 1, 1))
+    figure.savefig(output)
+    plt.close(figure)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ghost algorithms against map size")
+    parser.add_argument("--styles", nargs="+", default=list(STYLES), choices=STYLES)
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="WIDTHxHEIGHT, up to 4096x4096")
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    parser.add_argument("--pairs", type=int, default=50, help="random start/target pairs per map")
+    parser.add_argument("--seed", type=int, default=0, help="seeds the maps and the pairs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--instrumentation", default=FULL, choices=MODES,
+                        help="memory is only measured in full mode")
+    parser.add_argument("--maze-dir", default="generated_maps", help="where generated maps are kept between runs")
+    parser.add_argument("--output", help="write all results to a .json file")
+    parser.add_argument("--plot", help="write the charts to an image file (needs matplotlib)")
+    parser.add_argument("--baseline", help="compare against results saved with --save-baseline")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="relative time/memory growth over the baseline that counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes]
+    results = run_suite(args.styles, sizes, args.algorithms, args.pairs, args.seed, args.workers,
+                        args.instrumentation, args.maze_dir)
+    for r in results:
+        print(f"{r['style']:<8} {r['width']:>5}x{r['height']:<5} {r['algorithm']:<20} "
+              f"time p50={r['time_ms_p50']:.3f} ms  mem p50={r['memory_kb_p50']:.1f} KB  "
+              f"nodes={r['nodes_mean']:.0f}  found={r['found']}/{r['runs']}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+    if args.plot:
+        if plt is None:
+            print("matplotlib is not installed, skipping the plot", file=sys.stderr)
+        else:
+            plot(results, args.plot)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+        print("No regressions against", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""Pathfinding service: the ghost algorithms behind a local socket, no pygame needed.
+
+Loads the maps once and answers JSON lines, one request per line:
+
+    {"id": 1, "op": "find_path", "maze": "pacman_map.csv", "algorithm": "bfs", "start": [1, 26], "target": [30, 1]}
+    {"id": 2, "op": "stats"}
+
+find_path answers {"id", "path", "found", "shared", "algorithm_used",
+"nodes_expanded", "search_time"} (path excludes the start), a bad request
+{"id", "error"}.
+Requests may be pipelined and are answered as they finish, not in order.
+
+Concurrent requests for the same maze, algorithm and target are coalesced into
+one batch, and identical starts share one search. With --share, a batch of an
+optimal algorithm is answered from a single BFS out of the target instead
+(shared is true and algorithm_used is "distance_field"): every path is still
+a shortest one, but among equally short paths it may not be the one the
+algorithm itself would pick, and the metrics are the distance field's, not
+the algorithm's. The distance fields are cached per map across batches, and
+maps of at most ALL_PAIRS_CELLS cells get all of them at startup.
+Batches on maps of at least inline_cells cells run on a process pool, split
+over the workers when they are not shared; smaller maps are cheaper to search
+in the event loop than to ship to a worker.
+
+    python server.py pacman_map.csv pacman_map1.csv --port 8765 --share
+    python server.py pacman_map.csv --unix /tmp/pacman.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from instrumentation import MODES, TIMING
+from ghosts import CyanGhost, CorridorGhost
+from distance_field import DistanceFieldCache
+from benchmark import ALGORITHMS, init_worker, make_ghost, percentile, worker_mazes
+
+LATENCY_WINDOW = 10000  # latest answers the latency percentiles are taken over
+MIN_CHUNK = 16  # starts per pool task when a batch is split over the workers
+ALL_PAIRS_CELLS = 1024  # maps up to this size get every distance field at startup (about 2 MB at 32x28)
+
+worker_fields = {}  # map path -> DistanceFieldCache kept across batches in this process
+
+
+def finds_shortest(algorithm):
+    # Ghost.optimal without building the ghost (some need tables built per map first)
+    if algorithm.startswith("corridor_"):
+        return CorridorGhost((0, 0), None, algorithm[len("corridor_"):]).optimal
+    factory = ALGORITHMS[algorithm]
+    return getattr(factory, "func", factory).optimal
+
+
+def distance_fields(map_path):
+    fields = worker_fields.get(map_path)
+    if fields is None:
+        fields = worker_fields[map_path] = DistanceFieldCache(worker_mazes[map_path])
+    return fields
+
+
+def search_batch(map_path, algorithm, target, starts, shared):
+    """One algorithm from every start to one target; returns [(path, metrics)] in starts order.
+
+    shared answers every start from one BFS out of the target instead.
+    """
+    maze = worker_mazes[map_path]
+    fields = distance_fields(map_path) if shared else None
+    results = []
+    for start in starts:
+        ghost = CyanGhost(start, fields) if shared else make_ghost(algorithm, map_path, start)
+        ghost.find_path(maze, target)
+        metrics = ghost.finish_path(maze)  # hpa leaves most of its path to refine while walking
+        results.append((list(ghost.path), metrics))
+    return results
+
+
+class Batch:
+    __slots__ = ("map_path", "algorithm", "target", "waiters")
+
+    def __init__(self, map_path, algorithm, target):
+        self.map_path = map_path
+        self.algorithm = algorithm
+        self.target = target
+        self.waiters = {}  # start -> [futures of the requests from it]
+
+
+class PathServer:
+    def __init__(self, map_paths, workers=None, inline_cells=4096, batch_window=0.0, share=False,
+                 instrumentation_mode=TIMING):
+        init_worker(map_paths, instrumentation_mode)  # this process answers the inline batches
+        self.map_paths = list(map_paths)
+        for path in self.map_paths:
+            if len(worker_mazes[path].cells) <= ALL_PAIRS_CELLS:
+                distance_fields(path).precompute_all_pairs()  # shared batches become lookups
+        self.workers = workers or os.cpu_count()
+        self.inline_cells = inline_cells
+        self.share = share
+        self.batch_window = batch_window  # seconds a new batch waits for more requests; 0 = this loop pass only
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                        initargs=(self.map_paths, instrumentation_mode))
+        self.pending = {}  # (map, algorithm, target) -> Batch not dispatched yet
+        self.running = set()  # keys with a batch being searched; at most one each, the next one waits for it
+        self.started = perf_counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {
+            "requests": 0,
+            "answered": 0,
+            "errors": 0,
+            "batches": 0,
+            "offloaded": 0,  # batches run on the process pool
+            "searches": 0,
+            "coalesced": 0,  # requests answered by a search another request caused
+        }
+
+    def check(self, map_path, algorithm, start, target):
+        if map_path not in worker_mazes:
+            raise ValueError(f"Unknown maze {map_path!r}, loaded: {', '.join(self.map_paths)}")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}")
+        maze = worker_mazes[map_path]
+        for position in (start, target):
+            if not maze.is_valid_position(position):
+                raise ValueError(f"{list(position)} is not an open cell of {map_path}")
+
+    async def find_path(self, map_path, algorithm, start, target):
+        """Returns (path, metrics, shared), searching together with every concurrent request for the same target"""
+        self.check(map_path, algorithm, start, target)
+        key = (map_path, algorithm, target)
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = Batch(map_path, algorithm, target)
+            if key not in self.running:
+                self.schedule(key)
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.setdefault(start, []).append(future)
+        return await future
+
+    def schedule(self, key):
+        loop = asyncio.get_running_loop()
+        if self.batch_window:
+            loop.call_later(self.batch_window, self.dispatch, key)
+        else:
+            loop.call_soon(self.dispatch, key)  # after the requests already read this pass
+
+    def dispatch(self, key):
+        batch = self.pending.pop(key)
+        self.running.add(key)
+        self.counters["batches"] += 1
+        asyncio.ensure_future(self.run_batch(key, batch))
+
+    async def run_batch(self, key, batch):
+        try:
+            await self.search(batch)
+        finally:
+            self.running.discard(key)
+            if key in self.pending:  # requests that arrived while this batch was searched
+                self.schedule(key)
+
+    async def search(self, batch):
+        starts = list(batch.waiters)
+        shared = batch.algorithm == "distance_field" or (
+            self.share and len(starts) > 1 and finds_shortest(batch.algorithm))
+        try:
+            if len(worker_mazes[batch.map_path].cells) >= self.inline_cells:
+                results = await self.offload(batch, starts, shared)
+            else:
+                results = search_batch(batch.map_path, batch.algorithm, batch.target, starts, shared)
+        except Exception as error:  # a failed search fails its requests, not the server
+            for futures in batch.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+
+        searches = 1 if shared else len(starts)
+        self.counters["searches"] += searches
+        self.counters["coalesced"] += sum(len(futures) for futures in batch.waiters.values()) - searches
+        for start, (path, metrics) in zip(starts, results):
+            for future in batch.waiters[start]:
+                if not future.done():  # its client may have gone away
+                    future.set_result((path, metrics, shared))
+
+    async def offload(self, batch, starts, shared):
+        """Runs a batch on the pool: one task when shared, else spread over the workers"""
+        self.counters["offloaded"] += 1
+        loop = asyncio.get_running_loop()
+        size = len(starts) if shared else max(MIN_CHUNK, -(-len(starts) // self.workers))
+        chunks = await asyncio.gather(*(loop.run_in_executor(self.pool, search_batch, batch.map_path,
+                                                             batch.algorithm, batch.target, starts[i:i + size],
+                                                             shared)
+                                        for i in range(0, len(starts), size)))
+        return [result for chunk in chunks for result in chunk]
+
+    async def answer(self, request):
+        started = perf_counter()
+        request_id = request.get("id")
+        op = request.get("op", "find_path")
+        if op == "stats":
+            return {"id": request_id, **self.stats()}
+        if op != "find_path":
+            raise ValueError(f"Unknown op {op!r}")
+        start, target = tuple(request["start"]), tuple(request["target"])
+        path, metrics, shared = await self.find_path(request["maze"], request["algorithm"], start, target)
+        self.latencies.append(perf_counter() - started)
+        return {
+            "id": request_id,
+            "path": path,
+            "found": start == target or (bool(path) and path[-1] == target),
+            "shared": shared,
+            "algorithm_used": "distance_field" if shared else request["algorithm"],
+            "nodes_expanded": metrics["nodes_expanded"],
+            "search_time": metrics["search_time"],
+        }
+
+    async def respond(self, line, writer):
+        self.counters["requests"] += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = await self.answer(request)
+            self.counters["answered"] += 1
+        except Exception as error:
+            self.counters["errors"] += 1
+            response = {"id": request_id, "error": f"{type(error).__name__}: {error}"}
+        if not writer.is_closing():
+            writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+
+    async def handle(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def stats(self):
+        uptime = perf_counter() - self.started
+        latencies = sorted(latency * 1000 for latency in self.latencies)
+        stats = dict(self.counters, uptime=round(uptime, 3),
+                     throughput=round(self.counters["answered"] / uptime, 3) if uptime else 0)
+        for p in (50, 95, 99):
+            stats[f"latency_ms_p{p}"] = round(percentile(latencies, p), 3)
+        return stats
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the ghost search algorithms over a local socket")
+    parser.add_argument("maps", nargs="+", help="map CSV files, loaded once; requests name them as given here")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--inline-cells", type=int, default=4096,
+                        help="maps with fewer cells are searched in the event loop, larger ones on the pool")
+    parser.add_argument("--batch-window", type=float, default=0.0,
+                        help="seconds a batch waits for more requests with the same target")
+    parser.add_argument("--share", action="store_true",
+                        help="answer a batch of a shortest-path algorithm from one BFS out of its target; "
+                             "responses then report the distance field's metrics")
+    parser.add_argument("--instrumentation", default=TIMING, choices=MODES)
+    args = parser.parse_args(argv)
+
+    server = PathServer(args.maps, args.workers, args.inline_cells, args.batch_window, args.share,
+                        args.instrumentation)
+    print(f"Serving {len(args.maps)} maps on {args.unix or f'{args.host}:{args.port}'}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
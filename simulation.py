@@ -0,0 +1,264 @@
+from collections import Counter, deque
+
+from maze import Maze
+from instrumentation import FrameProfiler
+from ghosts import PacMan, BlueGhost, PinkGhost, OrangeGhost, RedGhost, PurpleGhost, CorridorGhost
+from corridors import CorridorGraph
+from autopilot import Autopilot
+from planner import ParallelPlanner
+from swarm import SwarmPlanner, SHARED
+
+# level: (parallel_execution, user_controlled)
+LEVELS = {
+    1: (False, True),
+    2: (False, True),
+    3: (False, True),
+    4: (False, True),
+    5: (True, True),
+    6: (True, False),
+    7: (False, True),
+    8: (False, True),
+}
+
+# level: index in ghosts of the only ghost that chases on that level
+SOLO_GHOSTS = {
+    1: 0,  # Blue
+    2: 1,  # Pink
+    3: 2,  # Orange
+    4: 3,  # Red
+}
+
+INCREMENTAL_LEVEL = 7  # Purple, kept out of ghosts so that no other level plans it
+SWARM_LEVEL = 8  # the swarm roster's ghosts, moved by one SwarmPlanner
+
+
+class Simulation:
+    """Game state and rules with no pygame dependency.
+
+    Game renders on top of this class; batch jobs can drive it directly with
+    run_ticks() as fast as the CPU allows.
+
+    planner_mode ("thread" or "process") makes levels 5 and 6 plan the ghosts on
+    a ParallelPlanner pool; the default None keeps the deterministic sequential
+    planning that headless runs rely on.
+
+    The swarm level spawns swarm_roster, [(kind, count)] as swarm.parse_roster
+    reads it, on cells drawn from swarm_seed; by default swarm_size cyan ghosts
+    that share one distance field. It is meant for stress-testing many ghosts
+    on large maps.
+
+    neighbor_seed shuffles the order searches visit neighbors in (see Maze);
+    together with the inputs per tick it fully determines a session, which is
+    what replay.py relies on.
+
+    corridors runs the BFS, DFS, UCS and A* ghosts on a CorridorGraph, which
+    contracts corridors into weighted edges, instead of cell by cell.
+
+    autopilot lets an Autopilot search drive Pac-Man, with autopilot_budget
+    seconds per move, so levels with no one at the keys can run unattended.
+    Its moves depend on the time budget; a recorded session logs them like
+    key presses. autopilot_budget=None caps the nodes searched per move
+    instead, which is deterministic.
+    """
+
+    def __init__(self, maze_layout, user_controlled=True, planner_mode=None, planner_workers=4,
+                 planner_deadline=0.25, swarm_size=64, swarm_seed=0, neighbor_seed=None, corridors=False,
+                 autopilot=False, autopilot_budget=0.01, swarm_roster=None):
+        self.neighbor_seed = neighbor_seed
+        self.maze = Maze(maze_layout, neighbor_seed)
+        self.pacman = PacMan((1, self.maze.height - 2))
+        self.corridors = corridors
+        if corridors:
+            graph = CorridorGraph(self.maze)
+            self.ghosts = [CorridorGhost((self.maze.width - 2, y), graph, method)
+                           for y, method in ((4, "bfs"), (3, "dfs"), (2, "ucs"), (1, "astar"))]
+        else:
+            self.ghosts = [
+                BlueGhost((self.maze.width - 2, 4)),
+                PinkGhost((self.maze.width - 2, 3)),
+                OrangeGhost((self.maze.width - 2, 2)),
+                RedGhost((self.maze.width - 2, 1)),
+            ]
+        self.pack = self.ghosts  # the ghosts chasing together on levels 5 and 6
+        self.purple = PurpleGhost((self.maze.width - 2, 1))  # starts where Red does for comparison
+        self.user_controlled = user_controlled
+        self.ghost_move = False
+        self.game_over = False
+        self.level = 1
+        self.parallel_execution = False
+        self.pacman_move_counter = 0
+        self.ghost_move_counter = 0
+        self.pacman_speed = 5  # Pac-Man moves every 10 frame
+        self.ghost_speed = 10  # Ghosts move every 30 frames
+        self.tick = 0  # update() calls so far, game over included
+        self.profiler = FrameProfiler()  # disabled until something turns it on
+        self.planner_mode = planner_mode
+        self.planner_workers = planner_workers
+        self.planner_deadline = planner_deadline
+        self.planner = None  # created on the first parallel tick
+        self.occupancy = Counter()  # position -> number of colliding ghosts standing there
+        self.swarm_roster = [tuple(entry) for entry in swarm_roster] if swarm_roster else [(SHARED, swarm_size)]
+        self.swarm_size = sum(count for _, count in self.swarm_roster)
+        self.swarm_seed = swarm_seed
+        self.swarm_planner = None  # created when the swarm level is first played
+        self.swarm = []
+        self.autopilot_budget = autopilot_budget
+        self.autopilot = Autopilot(self.maze, autopilot_budget) if autopilot else None
+        self.autopilot_direction = None  # the autopilot's last move
+
+    def parallel_planner(self):
+        if self.planner is None:
+            self.planner = ParallelPlanner(self.maze, self.planner_mode, self.planner_workers, self.planner_deadline)
+        return self.planner
+
+    def plan(self, ghost, parallel):
+        with self.profiler.phase(ghost.name):
+            if parallel and ghost in self.pack:
+                self.planner.request(ghost, self.pacman.position)
+            else:
+                ghost.update_path(self.maze, self.pacman.position)
+
+    def solo_ghost(self):
+        """The only ghost chasing on the current level, or None"""
+        if self.level == INCREMENTAL_LEVEL:
+            return self.purple
+        if self.level in SOLO_GHOSTS:
+            return self.ghosts[SOLO_GHOSTS[self.level]]
+        return None
+
+    def active_ghosts(self):
+        """Ghosts that chase (and are drawn) on the current level"""
+        if self.level == SWARM_LEVEL:
+            return self.swarm
+        solo_ghost = self.solo_ghost()
+        if solo_ghost is not None:
+            return [solo_ghost]
+        return self.pack
+
+    def set_level(self, level):
+        self.level = level
+        self.parallel_execution, self.user_controlled = LEVELS[level]
+        self.ghost_move = False
+        self.reset_game()
+
+    def toggle_running(self):
+        # Start or pause the ghosts (Enter in game)
+        self.user_controlled = not self.user_controlled
+        self.ghost_move = not self.ghost_move
+
+    def toggle_autopilot(self):
+        self.autopilot = None if self.autopilot else Autopilot(self.maze, self.autopilot_budget)
+
+    def update(self, direction=None):
+        """Advance one tick; direction is the (dx, dy) Pac-Man tries when it is his turn to move"""
+        self.tick += 1
+        if self.game_over:
+            return
+
+        # Increment movement counters
+        self.pacman_move_counter += 1
+        self.ghost_move_counter += 1
+
+        parallel = self.parallel_execution and self.planner_mode is not None
+        if parallel:
+            with self.profiler.phase("collect plans"):
+                self.parallel_planner().collect()  # pick up searches finished since the last tick
+
+        # Check if any ghost caught Pac-Man
+        for ghost in self.ghosts:
+            if ghost.position == self.pacman.position:
+                self.game_over = True
+                return
+        if self.level == INCREMENTAL_LEVEL and self.purple.position == self.pacman.position:
+            self.game_over = True
+            return
+        if self.level == SWARM_LEVEL and self.swarm_planner.ghost_at(self.pacman.position):
+            self.game_over = True
+            return
+
+        # Move Pac-Man every frame
+        if self.pacman_move_counter >= self.pacman_speed:
+            self.pacman_move_counter = 0
+            if self.autopilot is not None:  # overrides the keys
+                with self.profiler.phase("Autopilot"):
+                    direction = self.autopilot_direction = self.autopilot.choose(self)
+                if direction is not None:
+                    self.pacman.move(direction, self.maze)
+            # User control for PacMan
+            elif self.user_controlled and not self.game_over and direction is not None:
+                self.pacman.move(direction, self.maze)
+
+            if self.user_controlled:
+                for ghost in self.ghosts:
+                    self.plan(ghost, parallel)
+                if self.level == INCREMENTAL_LEVEL:
+                    self.plan(self.purple, False)
+
+        # Move ghosts
+        if self.ghost_move_counter >= self.ghost_speed and self.ghost_move:
+            self.ghost_move_counter = 0
+
+            active_ghost = self.solo_ghost()
+            if active_ghost is not None:
+                self.plan(active_ghost, False)
+                active_ghost.move(self.maze)
+            elif self.level == SWARM_LEVEL:
+                # One shared field and a reservation table move the whole swarm
+                with self.profiler.phase("Swarm"):
+                    self.swarm_planner.step(self.pacman.position)
+            else:  # Parallel execution for levels 5 and 6
+                # Update paths for all ghosts if not user-controlled
+                for ghost in self.pack:
+                    self.plan(ghost, parallel)
+
+                # Move all ghosts
+                self.occupancy = Counter(ghost.position for ghost in self.pack)
+                for ghost in self.pack:
+                    self.move_ghost(ghost)
+
+    def move_ghost(self, ghost):
+        """Move one ghost, reverting the move if another ghost already holds the cell"""
+        occupancy = self.occupancy
+        old_position = ghost.position
+        if not ghost.move(self.maze):
+            return
+        occupancy[old_position] -= 1
+        if occupancy[ghost.position]:
+            ghost.position = ghost.previous_position  # Revert move if collision
+            ghost.path.appendleft(ghost.previous_position)  # Add old position back to path
+        occupancy[ghost.position] += 1
+
+    def reset_game(self):
+        self.pacman.position = self.pacman.spawn_position
+        for ghost in self.ghosts + [self.purple]:
+            ghost.position = ghost.spawn_position
+            ghost.last_target_position = None  # Reset last target position
+
+        for ghost in self.ghosts + [self.purple]:
+            ghost.path = deque()
+
+        if self.level == SWARM_LEVEL:
+            if self.swarm_planner is None:
+                self.swarm_planner = SwarmPlanner(self.maze)
+            self.swarm = self.swarm_planner.spawn(self.swarm_roster, self.pacman.position, seed=self.swarm_seed)
+
+        if self.planner is not None:
+            self.planner.forget()
+        self.game_over = False
+
+    def close(self):
+        if self.planner is not None:
+            self.planner.shutdown()
+            self.planner = None
+
+    def run_ticks(self, max_ticks, controller=None):
+        """Step without any frame limit until Pac-Man is caught or max_ticks pass.
+
+        controller(simulation) returns Pac-Man's direction for each tick (or None).
+        Returns the number of ticks run.
+        """
+        for tick in range(max_ticks):
+            if self.game_over:
+                return tick
+            self.update(controller(self) if controller else None)
+        return max_ticks
@@ -0,0 +1,122 @@
+import random
+
+from constants import PATH
+from distance_field import DistanceFieldCache
+from ghosts import Ghost, BlueGhost, PinkGhost, OrangeGhost, RedGhost, PurpleGhost, CyanGhost
+
+SHARED = "cyan"  # roster kind of the ghosts that step along the shared distance field
+SEARCHING_GHOSTS = {  # roster kinds of the ghosts that run their own search
+    "blue": BlueGhost,
+    "pink": PinkGhost,
+    "orange": OrangeGhost,
+    "red": RedGhost,
+    "purple": PurpleGhost,
+}
+
+
+def parse_roster(text):
+    """"cyan:32,red:2" -> [("cyan", 32), ("red", 2)]; a kind with no count is one ghost"""
+    roster = []
+    for item in text.split(","):
+        kind, _, count = item.strip().partition(":")
+        if kind != SHARED and kind not in SEARCHING_GHOSTS:
+            raise ValueError(f"Unknown ghost kind {kind!r}, expected one of {', '.join([SHARED, *SEARCHING_GHOSTS])}")
+        count = int(count) if count else 1
+        if count < 0:
+            raise ValueError(f"Negative ghost count in {item!r}")
+        roster.append((kind, count))
+    return roster
+
+
+class SwarmPlanner:
+    """Moves a whole swarm of ghosts toward one target with a single shared search.
+
+    Every ghost chases Pac-Man, so one BFS distance field out of his cell
+    (cached per target by DistanceFieldCache) serves all the cyan ghosts and a
+    ghost's step is just a lookup of a neighbor one move closer. Ghosts of the
+    other roster kinds run their own search and step along their own path.
+
+    Conflicts go through a reservation table instead of moving and reverting:
+    ghosts closest to the target choose first, each cell can be reserved by one
+    ghost per tick, and a ghost may only enter a cell whose occupant has already
+    chosen to leave it. A ghost with no free cell waits where it is, so two
+    ghosts never share a cell or swap places.
+    """
+
+    def __init__(self, maze, distance_fields=None):
+        self.maze = maze
+        self.distance_fields = distance_fields or DistanceFieldCache(maze)
+        self.ghosts = []
+        self.occupied = {}  # cell id -> ghost standing there
+        self.metrics = {
+            "search_time": 0,
+            "memory_usage": 0,
+            "nodes_expanded": 0,
+            "waiting": 0
+        }
+
+    def spawn(self, roster, avoid_position, min_distance=8, seed=0):
+        """Place the roster's [(kind, count)] ghosts on distinct open cells at least min_distance moves from avoid_position"""
+        maze = self.maze
+        field = self.distance_fields.get(maze.cell_id(avoid_position))
+        cells = [cell for cell, value in enumerate(maze.cells)
+                 if value == PATH and (field[cell] < 0 or field[cell] >= min_distance)]
+        kinds = [kind for kind, count in roster for _ in range(count)]
+        cells = random.Random(seed).sample(cells, min(len(kinds), len(cells)))
+        self.ghosts = [CyanGhost(maze.cell_position(cell), self.distance_fields) if kind == SHARED
+                       else SEARCHING_GHOSTS[kind](maze.cell_position(cell)) for kind, cell in zip(kinds, cells)]
+        self.occupied = dict(zip(cells, self.ghosts))
+        return self.ghosts
+
+    def step(self, target_position):
+        """Move every ghost at most one cell toward the target"""
+        maze = self.maze
+        offsets, neighbor_ids = maze.neighbor_offsets, maze.neighbor_ids
+        with Ghost.instrumentation.measure() as measurement:
+            field = self.distance_fields.get(maze.cell_id(target_position))
+            nodes_expanded = self.distance_fields.last_nodes_expanded
+
+            # Closest ghosts first; unreachable ones (-1) go last and just wait
+            order = sorted((field[cell] if field[cell] >= 0 else len(field), cell)
+                           for cell in self.occupied)
+            waiting = self.occupied  # cells of ghosts that have not chosen yet
+            reserved = {}  # cell id -> ghost that stands there after this tick
+            wait_count = 0
+            for distance, cell in order:
+                ghost = waiting.pop(cell)
+                next_cell = cell
+                if not isinstance(ghost, CyanGhost):
+                    # Its own search picks the cell, the reservation table still decides if it may enter
+                    last_search = ghost.metrics
+                    ghost.update_path(maze, target_position)
+                    if ghost.metrics is not last_search:
+                        nodes_expanded += ghost.metrics["nodes_expanded"]
+                    if ghost.path:
+                        wanted = maze.cell_id(ghost.path[0])
+                        if wanted not in waiting and wanted not in reserved:
+                            next_cell = wanted
+                            ghost.path.popleft()
+                elif 0 < distance < len(field):
+                    for neighbor in neighbor_ids[offsets[cell]:offsets[cell + 1]]:
+                        if field[neighbor] == distance - 1 and neighbor not in waiting and neighbor not in reserved:
+                            next_cell = neighbor
+                            break
+                if next_cell == cell:
+                    wait_count += 1
+                else:
+                    ghost.previous_position = ghost.position
+                    ghost.position = maze.cell_position(next_cell)
+                reserved[next_cell] = ghost
+            self.occupied = reserved
+
+        self.metrics = {
+            "search_time": measurement.search_time,
+            "memory_usage": measurement.memory_usage,  # KB, None when not measured
+            "nodes_expanded": nodes_expanded,
+            "waiting": wait_count
+        }
+        return self.metrics
+
+    def ghost_at(self, position):
+        cell = self.maze.cell_id(position)
+        return self.occupied.get(cell)
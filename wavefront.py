@@ -0,0 +1,251 @@
+"""Batched BFS with NumPy: many sources expanded at once, one array shift per direction.
+
+The maze becomes a boolean grid padded with walls. A chunk of K sources is a
+(height + 2, width + 2, K / 8) frontier, one bit per source, that grows by
+OR-ing its four shifted copies, masked by the open cells each source has not
+reached yet, so one step advances every wavefront with a handful of array
+operations instead of a Python loop per cell and source. Distances are kept
+as bit-planes and only unpacked into int32 fields once the wavefronts stop. Moves are symmetric, so matrices and
+pair queries expand whichever side has fewer distinct cells.
+
+    python wavefront.py pacman_map.csv pacman_map1.csv --pairs 5000 --check
+"""
+import argparse
+import random
+import sys
+from time import perf_counter
+
+from constants import PATH, NEIGHBOR_DIRECTIONS
+from maze import Maze, load_maze_layout
+from ghosts import BlueGhost
+from benchmark import random_pairs
+from distance_field import bfs_distance_field, DistanceFieldCache
+
+try:
+    import numpy as np
+except ImportError:  # only this module needs NumPy
+    np = None
+
+UNREACHABLE = -1  # distance to walls and to cells cut off from the source
+NO_STEP = -1  # next step at the source itself and where it cannot be reached
+
+
+class WavefrontEngine:
+    """Distance fields, distance matrices and next steps for batches of positions.
+
+    Sources are expanded max_bytes worth of wavefronts at a time. Next steps
+    are indices into NEIGHBOR_DIRECTIONS; among equally short moves the first
+    in that order wins, as DistanceFieldCache.next_step picks on an unseeded maze.
+    """
+
+    def __init__(self, maze, max_bytes=256 * 1024 * 1024):
+        if np is None:
+            raise ImportError("WavefrontEngine needs NumPy")
+        self.maze = maze
+        self.max_bytes = max_bytes
+        height, width = maze.height, maze.width
+        self.open = np.zeros((height + 2, width + 2), dtype=bool)  # padded with walls
+        self.open[1:-1, 1:-1] = np.frombuffer(bytes(maze.cells), dtype=np.uint8).reshape(height, width) == PATH
+        self.steps = 0  # wavefront steps taken by the last expansion, summed over its chunks
+
+    def source_cells(self, positions):
+        """Cell ids of (x, y) positions, -1 for positions outside the maze or on a wall"""
+        maze = self.maze
+        cells = np.array([maze.cell_id(position) for position in positions], dtype=np.int64)
+        valid = cells >= 0
+        valid[valid] = np.frombuffer(bytes(maze.cells), dtype=np.uint8)[cells[valid]] == PATH
+        return np.where(valid, cells, -1)
+
+    def chunk_size(self):
+        # Per source: its int32 field, the unpacked plane being added to it, and an eighth of a byte per padded cell
+        # for the frontiers, the unreached mask and up to 32 distance bit-planes
+        padded = (self.maze.height + 2) * (self.maze.width + 2)
+        return max(1, self.max_bytes // (5 * self.maze.height * self.maze.width + 35 * padded // 8))
+
+    def fields(self, positions):
+        """Distance fields out of every position: int32 (len(positions), height, width), UNREACHABLE where none"""
+        cells = self.source_cells(positions)
+        fields = np.empty((len(cells), self.maze.height, self.maze.width), dtype=np.int32)
+        self.steps = 0
+        size = self.chunk_size()
+        for i in range(0, len(cells), size):
+            fields[i:i + size] = self.expand(cells[i:i + size])
+        return fields
+
+    def expand(self, cells):
+        """Fields for one chunk of source cell ids"""
+        height, width = self.maze.height, self.maze.width
+        count = len(cells)
+        # Sources are bits on the last axis, eight to a byte, so one byte operation advances eight wavefronts
+        # and each shifted slice below is a run of whole rows in memory
+        frontier = np.zeros((height + 2, width + 2, (count + 7) // 8), dtype=np.uint8)
+        valid = np.flatnonzero(cells >= 0)
+        y, x = np.divmod(cells[valid], width)
+        np.bitwise_or.at(frontier, (y + 1, x + 1, valid // 8), (1 << (valid % 8)).astype(np.uint8))
+        # Walls and the padding are never unreached, so they never join a frontier
+        unreached = np.where(self.open[:, :, None], np.uint8(255), np.uint8(0)) & ~frontier
+        grown = np.zeros_like(frontier)
+        inner = grown[1:-1, 1:-1]
+        planes = []  # planes[b]: bit b of every distance, ORed in as each frontier is reached
+        distance = 0
+        while True:
+            for bit in range(distance.bit_length()):
+                if distance >> bit & 1:
+                    if bit == len(planes):
+                        planes.append(np.zeros_like(frontier))
+                    np.bitwise_or(planes[bit], frontier, out=planes[bit])
+            # Every cell next to the frontier: the frontier shifted one cell each way
+            np.bitwise_or(frontier[:-2, 1:-1], frontier[2:, 1:-1], out=inner)
+            np.bitwise_or(inner, frontier[1:-1, :-2], out=inner)
+            np.bitwise_or(inner, frontier[1:-1, 2:], out=inner)
+            np.bitwise_and(grown, unreached, out=grown)
+            if not grown.any():
+                break
+            np.bitwise_xor(unreached, grown, out=unreached)
+            frontier, grown = grown, frontier
+            inner = grown[1:-1, 1:-1]
+            distance += 1
+            self.steps += 1
+
+        def unpack(packed):
+            return np.unpackbits(packed[1:-1, 1:-1], axis=-1, count=count, bitorder="little")
+
+        field = np.zeros((height, width, count), dtype=np.int32)
+        for bit, plane in enumerate(planes):
+            field |= unpack(plane).astype(np.int32) << bit
+        # Open cells a source never reached, and walls, which were never unreached
+        unreached[~self.open] = 255
+        field[unpack(unreached).view(bool)] = UNREACHABLE
+        return field.transpose(2, 0, 1)
+
+    def next_steps(self, fields):
+        """Move toward each field's source from every cell: int8 indices into NEIGHBOR_DIRECTIONS, or NO_STEP"""
+        count, height, width = fields.shape
+        padded = np.full((count, height + 2, width + 2), UNREACHABLE, dtype=np.int32)
+        padded[:, 1:-1, 1:-1] = fields
+        steps = np.full(fields.shape, NO_STEP, dtype=np.int8)
+        closer = fields - 1
+        # Last direction first, so the first one in NEIGHBOR_DIRECTIONS order is what remains
+        for index in reversed(range(len(NEIGHBOR_DIRECTIONS))):
+            dx, dy = NEIGHBOR_DIRECTIONS[index]
+            neighbor = padded[:, 1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+            steps[(fields > 0) & (neighbor == closer)] = index
+        return steps
+
+    def distance_matrix(self, sources, targets):
+        """int32 (len(sources), len(targets)) moves from each source to each target, UNREACHABLE where none"""
+        if not sources or not targets:
+            return np.zeros((len(sources), len(targets)), dtype=np.int32)
+        unique_sources = list(dict.fromkeys(sources))
+        unique_targets = list(dict.fromkeys(targets))
+        if len(unique_targets) < len(unique_sources):
+            # Distances are symmetric: expand from the smaller side and read the other off its fields
+            return self.distance_matrix(targets, sources).T
+        source_index = {position: i for i, position in enumerate(unique_sources)}
+        fields = self.fields(unique_sources).reshape(len(unique_sources), -1)
+        target_cells = self.source_cells(targets)
+        matrix = fields[:, np.maximum(target_cells, 0)]
+        matrix[:, target_cells < 0] = UNREACHABLE
+        return matrix[[source_index[position] for position in sources]]
+
+    def pair_distances(self, pairs):
+        """int32 distance of every (a, b) pair, e.g. (ghost, Pac-Man) positions"""
+        if not pairs:
+            return np.zeros(0, dtype=np.int32)
+        a_side, b_side = zip(*pairs)
+        if len(set(b_side)) > len(set(a_side)):
+            a_side, b_side = b_side, a_side
+        # Expand from the distinct b positions, then look up each a in its pair's field
+        unique = list(dict.fromkeys(b_side))
+        index = {position: i for i, position in enumerate(unique)}
+        fields = self.fields(unique).reshape(len(unique), -1)
+        cells = self.source_cells(a_side)
+        distances = fields[[index[position] for position in b_side], np.maximum(cells, 0)]
+        distances[cells < 0] = UNREACHABLE
+        return distances
+
+
+def check(maze, engine):
+    """Compare every field and next step with the existing BFS; returns a list of mismatches"""
+    maze_cells = maze.width * maze.height
+    positions = [maze.cell_position(cell) for cell in range(maze_cells) if maze.cells[cell] == PATH]
+    fields = engine.fields(positions)
+    steps = engine.next_steps(fields)
+    reference = DistanceFieldCache(maze)
+    mismatches = []
+    for i, position in enumerate(positions):
+        expected = np.array(bfs_distance_field(maze, maze.cell_id(position))[0], dtype=np.int32)
+        if not np.array_equal(fields[i].ravel(), expected):
+            mismatches.append(f"field out of {position}")
+            continue
+        for cell in range(maze_cells):
+            next_position = reference.next_step(maze.cell_position(cell), position)
+            step = steps[i].flat[cell]
+            got = None
+            if step != NO_STEP:
+                y, x = divmod(cell, maze.width)
+                dx, dy = NEIGHBOR_DIRECTIONS[step]
+                got = (x + dx, y + dy)
+            if got != next_position:
+                mismatches.append(f"next step from {maze.cell_position(cell)} toward {position}: {got} != {next_position}")
+
+    # The ghosts' own BFS, on a sample of targets: path lengths must match the matrix
+    targets = positions[::max(1, len(positions) // 20)]
+    matrix = engine.distance_matrix(positions, targets)
+    for i, start in enumerate(positions):
+        for j, target in enumerate(targets):
+            ghost = BlueGhost(start)
+            ghost.find_path(maze, target)
+            expected = len(ghost.path) if ghost.path or start == target else UNREACHABLE
+            if matrix[i, j] != expected:
+                mismatches.append(f"BlueGhost {start} -> {target}: {matrix[i, j]} != {expected}")
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batched BFS distance fields with NumPy")
+    parser.add_argument("maps", nargs="+", help="map CSV files")
+    parser.add_argument("--check", action="store_true",
+                        help="compare every field and next step against the existing BFS")
+    parser.add_argument("--pairs", type=int, default=2000, help="random pairs to time against one search each")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for path in args.maps:
+        maze = Maze(load_maze_layout(path))
+        engine = WavefrontEngine(maze)
+        positions = [maze.cell_position(cell) for cell, value in enumerate(maze.cells) if value == PATH]
+
+        started = perf_counter()
+        engine.fields(positions)
+        batched = perf_counter() - started
+        started = perf_counter()
+        for position in positions:
+            bfs_distance_field(maze, maze.cell_id(position))
+        one_by_one = perf_counter() - started
+        print(f"{path}: {len(positions)} fields in {batched * 1000:.1f} ms batched "
+              f"vs {one_by_one * 1000:.1f} ms one BFS at a time ({one_by_one / batched:.1f}x)")
+
+        pairs = random_pairs(maze, args.pairs, random.Random(args.seed))
+        started = perf_counter()
+        engine.pair_distances(pairs)
+        batched = perf_counter() - started
+        started = perf_counter()
+        for start, target in pairs:
+            BlueGhost(start).find_path(maze, target)
+        one_by_one = perf_counter() - started
+        print(f"{path}: {len(pairs)} pairs in {batched * 1000:.1f} ms batched "
+              f"vs {one_by_one * 1000:.1f} ms one BlueGhost.find_path each ({one_by_one / batched:.1f}x)")
+
+        if args.check:
+            mismatches = check(maze, engine)
+            for line in mismatches[:10]:
+                print("MISMATCH", line)
+            print(f"{path}: {'OK' if not mismatches else f'{len(mismatches)} mismatches'}")
+            failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())